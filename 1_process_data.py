@@ -1,6 +1,16 @@
 import pandas as pd
-import numpy as np
-from web3 import Web3
+
+from campaign_rules import (
+    Campaign,
+    CapComponent,
+    FixedAllocation,
+    MatchAllocation,
+    Threshold,
+    TieredAllocation,
+    load_address_keys,
+    run_campaign,
+)
+from persistent_cache import PersistentCache
 
 # Input data files
 ARMA_FILE = "./data/arma_leaderboard.csv"
@@ -17,356 +27,108 @@ GALXE_OUTPUT_FILE = "./processed/galxe_allocations.csv"
 MEGAPHONE_OUTPUT_FILE = "./processed/megaphone_allocations.csv"
 COMMUNITY_OUTPUT_FILE = "./processed/community_allocations.csv"
 DISCORD_OUTPUT_FILE = "./processed/discord_role.csv"
+DROP_LOG_FILE = "./processed/drop_log.csv"
 
-TOTAL_SUPPLY = 1_000_000_000
 SOCIALS_ALLOCATION = 180  # Fixed allocation for social campaigns
 
-
-def calculate_arma_allocations():
-    """
-    Calculates token allocations for the ARMA campaign using a tier-based approach.
-
-    Methodology:
-    1. Filter out entries with less than 60 points
-    2. Allocate tokens based on points tiers:
-        - 60-100 points: 180 tokens
-        - 100-250 points: 385 tokens
-        - 250-500 points: 1150 tokens
-        - 500-1000 points: 1715 tokens
-        - 1000-2000 points: 2850 tokens
-        - 2000-5000 points: 5700 tokens
-        - 5000-10000 points: 11430 tokens
-        - 10000-25000 points: 17000 tokens
-        - 25000-50000 points: 25000 tokens
-        - 50000-100000 points: 52500 tokens
-        - 100000+ points: 85000 tokens
-    """
-    print("--- Processing ARMA Campaign ---")
-    # Read and clean data
-    df = pd.read_csv(ARMA_FILE)
-    initial_count = len(df)
-    print(f"Initial addresses: {initial_count}")
-
-    # Convert addresses to checksum format
-    df["eoa"] = df["eoa"].apply(lambda x: Web3.to_checksum_address(x))
-
-    # Filter out entries with less than 60 points
-    count_before_points_filter = len(df)
-    df = df[df["points"] >= 60]
-    count_after_points_filter = len(df)
-    print(
-        f"Addresses after filtering points < 60: {count_after_points_filter} (dropped {count_before_points_filter - count_after_points_filter})"
-    )
-
-    # Check for duplicates
-    duplicates = df[df.duplicated(subset=["eoa"], keep=False)]
-    if not duplicates.empty:
-        print(f"Duplicate addresses found in ARMA campaign: {len(duplicates)}")
-        # print(duplicates[["eoa", "points"]].sort_values("eoa")) # Optional: uncomment to see duplicates
-
-    # Remove duplicates keeping the first occurrence
-    count_before_duplicates = len(df)
-    df = df.drop_duplicates(subset=["eoa"], keep="first")
-    count_after_duplicates = len(df)
-    print(
-        f"Addresses after removing duplicates: {count_after_duplicates} (dropped {count_before_duplicates - count_after_duplicates})"
-    )
-
-    # Initialize Token column
-    df["Token"] = 0
-
-    # Apply tier-based token allocation
-    df.loc[(df["points"] > 60) & (df["points"] <= 100), "Token"] = 180
-    df.loc[(df["points"] > 100) & (df["points"] <= 250), "Token"] = 385
-    df.loc[(df["points"] > 250) & (df["points"] <= 500), "Token"] = 1150
-    df.loc[(df["points"] > 500) & (df["points"] <= 1000), "Token"] = 1715
-    df.loc[(df["points"] > 1000) & (df["points"] <= 2000), "Token"] = 2850
-    df.loc[(df["points"] > 2000) & (df["points"] <= 5000), "Token"] = 5700
-    df.loc[(df["points"] > 5000) & (df["points"] <= 10000), "Token"] = 11430
-    df.loc[(df["points"] > 10000) & (df["points"] <= 25000), "Token"] = 17000
-    df.loc[(df["points"] > 25000) & (df["points"] <= 50000), "Token"] = 25000
-    df.loc[(df["points"] > 50000) & (df["points"] <= 100000), "Token"] = 52500
-    df.loc[df["points"] > 100000, "Token"] = 85000
-
-    # Clean up and standardize column names
-    df.rename(columns={"eoa": "Address"}, inplace=True)
-    df = df[["Address", "Token"]]
-
-    # Display total tokens
-    print(f"ARMA Campaign Final Count: {len(df)}")
-    print(f"ARMA Campaign Total Tokens: {df['Token'].sum():,.2f}")
-    print(f"ARMA Campaign Total Tokens: {df['Token'].sum() / TOTAL_SUPPLY:.2%}")
-    # Save the processed allocation data
-    df.to_csv(ARMA_OUTPUT_FILE, index=False)
-
-
-def calculate_community_allocations():
-    """
-    Calculates token allocations for the community campaign.
-    Only considers participants from the Feedback sprint, not the oasis gathering.
-
-    Methodology:
-    - Filter addresses that exist in ARMA data
-    - Filter for participants with at least 100 points
-    - Allocate 385 tokens for participants with exactly 300 points
-    - Save results to COMMUNITY_OUTPUT_FILE
-    """
-    print("--- Processing Community Campaign ---")
-    # Read input data
-    df = pd.read_csv(COMMUNITY_FILE)
-    df_arma = pd.read_csv(ARMA_FILE)
-    initial_count = len(df)
-    print(f"Initial addresses: {initial_count}")
-
-    # Convert addresses to checksum format
-    df["eoa"] = df["eoa"].apply(lambda x: Web3.to_checksum_address(x))
-    df_arma["eoa"] = df_arma["eoa"].apply(lambda x: Web3.to_checksum_address(x))
-
-    # Filter marketing addresses that exist in ARMA data
-    count_before_arma_filter = len(df)
-    filtered_df = df[df["eoa"].isin(df_arma["eoa"])].copy()
-    count_after_arma_filter = len(filtered_df)
-    print(
-        f"Addresses after filtering for existence in ARMA: {count_after_arma_filter} (dropped {count_before_arma_filter - count_after_arma_filter})"
-    )
-
-    # Filter for participants with at least 100 points
-    count_before_points_filter = len(filtered_df)
-    filtered_df = filtered_df[filtered_df["points"] >= 100]
-    count_after_points_filter = len(filtered_df)
-    print(
-        f"Addresses after filtering points <= 100: {count_after_points_filter} (dropped {count_before_points_filter - count_after_points_filter})"
-    )
-
-    # Initialize Token column to 0 for all remaining participants
-    filtered_df["Token"] = 0
-
-    # Set token allocation for 300 points participants
-    filtered_df.loc[filtered_df["points"] == 300, "Token"] = 385
-    # Optional: Add a check for NaNs if needed
-    # nan_token_count = filtered_df['Token'].isna().sum()
-    # if nan_token_count > 0:
-    #     print(f"Warning: {nan_token_count} addresses have NaN token values after allocation.")
-
-    # Clean up and standardize column names
-    filtered_df.rename(columns={"eoa": "Address"}, inplace=True)
-    filtered_df = filtered_df[["Address", "Token"]]
-
-    # Display total tokens
-    print(f"Community Campaign Final Count: {len(filtered_df)}")
-    print(f"Community Campaign Total Tokens: {filtered_df['Token'].sum():,.2f}")
-    print(
-        f"Community Campaign Total Tokens: {filtered_df['Token'].sum() / TOTAL_SUPPLY:.3%}"
-    )
-    # Save the processed allocation data
-    filtered_df.to_csv(COMMUNITY_OUTPUT_FILE, index=False)
-
-    return filtered_df
-
-
-def calculate_layer3_allocations():
-    """
-    Calculates token allocations for the Layer3 campaign.
-
-    Methodology:
-    - Equal distribution model where all qualifying participants receive the same allocation
-    - Each participant receives a fixed amount of 180 tokens
-    - Filter addresses to only include those present in the ARMA leaderboard
-    """
-    print("--- Processing Layer3 Campaign ---")
-    # Read and clean data
-    df = pd.read_csv(LAYER3_FILE)
-    df_arma = pd.read_csv(ARMA_FILE)
-    initial_count = len(df)
-    print(f"Initial addresses: {initial_count}")
-
-    # Convert addresses to checksum format
-    df["UserAddress"] = df["UserAddress"].apply(lambda x: Web3.to_checksum_address(x))
-    df_arma["eoa"] = df_arma["eoa"].apply(lambda x: Web3.to_checksum_address(x))
-
-    # Filter Layer3 addresses that exist in ARMA data
-    count_before_arma_filter = len(df)
-    df = df[df["UserAddress"].isin(df_arma["eoa"])].copy()
-    count_after_arma_filter = len(df)
-    print(
-        f"Addresses after filtering for existence in ARMA: {count_after_arma_filter} (dropped {count_before_arma_filter - count_after_arma_filter})"
-    )
-
-    # Check for duplicates
-    duplicates = df[df.duplicated(subset=["UserAddress"], keep=False)]
-    if not duplicates.empty:
-        print(f"Duplicate addresses found in Layer3 campaign: {len(duplicates)}")
-        # print(duplicates[["UserAddress", "Quest"]].sort_values("UserAddress")) # Optional: uncomment to see duplicates
-
-    # Remove duplicates keeping the first occurrence
-    count_before_duplicates = len(df)
-    df = df.drop_duplicates(subset=["UserAddress"], keep="first")
-    count_after_duplicates = len(df)
-    print(
-        f"Addresses after removing duplicates: {count_after_duplicates} (dropped {count_before_duplicates - count_after_duplicates})"
-    )
-
-    # Remove unnecessary columns and standardize column names
-    df.drop("Quest", axis=1, inplace=True)
-    df.rename(columns={"UserAddress": "Address"}, inplace=True)
-
-    # Fixed allocation of 180 tokens per participant
-    df["Token"] = SOCIALS_ALLOCATION
-
-    # Display total tokens
-    print(f"Layer3 Campaign Final Count: {len(df)}")
-    print(f"Layer3 Campaign Total Tokens: {df['Token'].sum():,.2f}")
-    print(f"Layer3 Campaign Total Tokens: {df['Token'].sum() / TOTAL_SUPPLY:.2%}")
-
-    # Save the processed allocation data
-    df.to_csv(LAYER3_OUTPUT_FILE, index=False)
-
-
-def calculate_galxe_allocations():
+def to_checksum_addresses(addresses, cache):
     """
-    Calculates token allocations for the Galxe campaign.
+    Converts a column of addresses to checksum format.
 
-    Methodology:
-    - Equal distribution model where all qualifying participants receive the same allocation
-    - Filters for participants with at least 160 points
-    - Each participant receives a fixed amount of 180 tokens
+    Conversions are cached on disk, so addresses seen in earlier runs are not hashed again.
     """
-    print("--- Processing Galxe Campaign ---")
-    # Read and clean data
-    df = pd.read_csv(GALXE_FILE)
-    initial_count = len(df)
-    print(f"Initial addresses: {initial_count}")
-
-    # Convert addresses to checksum format
-    df["Wallet_20_Address"] = df["Wallet_20_Address"].apply(
-        lambda x: Web3.to_checksum_address(x)
-    )
-
-    # Check for duplicates
-    duplicates = df[df.duplicated(subset=["Wallet_20_Address"], keep=False)]
-    if not duplicates.empty:
-        print(f"Duplicate addresses found in Galxe campaign: {len(duplicates)}")
-        # print(duplicates[["Wallet_20_Address", "Point"]].sort_values("Wallet_20_Address")) # Optional
-
-    # Remove duplicates keeping the first occurrence
-    count_before_duplicates = len(df)
-    df = df.drop_duplicates(subset=["Wallet_20_Address"], keep="first")
-    count_after_duplicates = len(df)
-    print(
-        f"Addresses after removing duplicates: {count_after_duplicates} (dropped {count_before_duplicates - count_after_duplicates})"
-    )
-
-    # Filter for participants with at least 160 points
-    count_before_points_filter = len(df)
-    df = df[df["Point"] >= 160]
-    count_after_points_filter = len(df)
-    print(
-        f"Addresses after filtering points < 160: {count_after_points_filter} (dropped {count_before_points_filter - count_after_points_filter})"
-    )
-
-    # Fixed allocation of 180 tokens per participant
-    df["Token"] = SOCIALS_ALLOCATION
-
-    # Clean up and standardize column names
-    df.rename(columns={"Wallet_20_Address": "Address"}, inplace=True)
-    df.drop(["Address_20_Type", "Point", "Ranking"], axis=1, inplace=True)
+    return cache.checksum_addresses(addresses.tolist())
 
-    # Display total tokens
-    print(f"Galxe Campaign Final Count: {len(df)}")
-    print(f"Galxe Campaign Total Tokens: {df['Token'].sum():,.2f}")
-    print(f"Galxe Campaign Total Tokens: {df['Token'].sum() / TOTAL_SUPPLY:.2%}")
 
-    # Save the processed allocation data
-    df.to_csv(GALXE_OUTPUT_FILE, index=False)
-
-
-def calculate_megaphone_allocations():
+def save_drop_log(drop_log):
     """
-    Calculates token allocations for the Megaphone campaign.
+    Saves the first recorded drop reason per campaign and address.
 
-    Methodology:
-    - Process referral points by:
-      1. Subtracting referral points from total points
-      2. Capping referral points at 100
-      3. Adding back the capped referral points to total points
-    - Filter participants with more than 205 points
-    - Each participant receives a fixed amount of 180 tokens
+    Args:
+        drop_log: Campaign/Address/Reason frames of the addresses each campaign left without tokens
     """
-    print("--- Processing Megaphone Campaign ---")
-    # Read and clean data
-    df = pd.read_csv(MEGAPHONE_CAMPAIGN_FILE)
-    initial_count = len(df)
-    print(f"Initial addresses: {initial_count}")
-
-    # Remove rows with NaN wallet addresses
-    count_before_nan_drop = len(df)
-    df = df.dropna(subset=["walletAddress"])
-    count_after_nan_drop = len(df)
-    print(
-        f"Addresses after dropping NaN walletAddress: {count_after_nan_drop} (dropped {count_before_nan_drop - count_after_nan_drop})"
-    )
-
-    # Convert wallet addresses to string and remove any whitespace
-    df["walletAddress"] = df["walletAddress"].astype(str).str.strip()
-
-    # Convert addresses to checksum format
-    df["walletAddress"] = df["walletAddress"].apply(
-        lambda x: Web3.to_checksum_address(x)
+    df = pd.concat(drop_log, ignore_index=True).drop_duplicates(
+        subset=["Campaign", "Address"], keep="first"
     )
-
-    # Check for duplicates
-    duplicates = df[df.duplicated(subset=["walletAddress"], keep=False)]
-    if not duplicates.empty:
-        print(f"Duplicate addresses found in Megaphone campaign: {len(duplicates)}")
-        # print(duplicates[["walletAddress", "totalPoints"]].sort_values("walletAddress")) # Optional
-
-    # Remove duplicates keeping the first occurrence
-    count_before_duplicates = len(df)
-    df = df.drop_duplicates(subset=["walletAddress"], keep="first")
-    count_after_duplicates = len(df)
-    print(
-        f"Addresses after removing duplicates: {count_after_duplicates} (dropped {count_before_duplicates - count_after_duplicates})"
-    )
-
-    # Subtract referralPoints from totalPoints
-    df["totalPoints"] = df["totalPoints"] - df["referralPoints"]
-
-    # Cap referralPoints to 100
-    df["referralPoints"] = df["referralPoints"].clip(upper=100)
-
-    # Add back capped referralPoints to totalPoints
-    df["totalPoints"] = df["totalPoints"] + df["referralPoints"]
-
-    # Filter for participants with more than 205 points
-    count_before_points_filter = len(df)
-    df = df[df["totalPoints"] > 205]
-    count_after_points_filter = len(df)
-    print(
-        f"Addresses after filtering points <= 205: {count_after_points_filter} (dropped {count_before_points_filter - count_after_points_filter})"
-    )
-
-    # Fixed allocation of 180 tokens per participant
-    df["token"] = SOCIALS_ALLOCATION
-
-    # Clean up and standardize column names
-    df.rename(columns={"walletAddress": "Address", "token": "Token"}, inplace=True)
-    df = df[["Address", "Token"]]
-
-    # Display total tokens
-    print(f"Megaphone Campaign Final Count: {len(df)}")
-    print(f"Megaphone Campaign Total Tokens: {df['Token'].sum():,.2f}")
-    print(f"Megaphone Campaign Total Tokens: {df['Token'].sum() / TOTAL_SUPPLY:.2%}")
-    # Save the processed allocation data
-    df.to_csv(MEGAPHONE_OUTPUT_FILE, index=False)
-
-
-def checksum_discord_roles():
+    df.to_csv(DROP_LOG_FILE, index=False)
+    print(f"Drop log saved to {DROP_LOG_FILE} ({len(df)} entries)")
+
+
+# Campaign rules, compiled and run by campaign_rules.run_campaign
+CAMPAIGNS = [
+    # Tier-based allocation on points; entries with less than 60 points are dropped.
+    # Tier i covers (bounds[i], bounds[i + 1]] points, e.g. 60-100 points: 180 tokens,
+    # 100-250 points: 385 tokens, ..., 100000+ points: 85000 tokens.
+    Campaign(
+        name="ARMA",
+        source_file=ARMA_FILE,
+        output_file=ARMA_OUTPUT_FILE,
+        address_column="eoa",
+        filters=[Threshold("points", ">=", 60, "points < 60")],
+        dedupe="after_filters",
+        allocation=TieredAllocation(
+            column="points",
+            bounds=[60, 100, 250, 500, 1000, 2000, 5000, 10000, 25000, 50000, 100000],
+            tokens=[180, 385, 1150, 1715, 2850, 5700, 11430, 17000, 25000, 52500, 85000],
+            zero_reason="no points tier",
+        ),
+    ),
+    # Equal distribution to participants present in the ARMA leaderboard
+    Campaign(
+        name="Layer3",
+        source_file=LAYER3_FILE,
+        output_file=LAYER3_OUTPUT_FILE,
+        address_column="UserAddress",
+        require_arma=True,
+        dedupe="after_filters",
+        allocation=FixedAllocation(SOCIALS_ALLOCATION),
+    ),
+    # Equal distribution to participants with at least 160 points
+    Campaign(
+        name="Galxe",
+        source_file=GALXE_FILE,
+        output_file=GALXE_OUTPUT_FILE,
+        address_column="Wallet_20_Address",
+        dedupe="before_filters",
+        filters=[Threshold("Point", ">=", 160, "points < 160")],
+        allocation=FixedAllocation(SOCIALS_ALLOCATION),
+    ),
+    # Equal distribution to participants with more than 205 points once
+    # referral points are capped at 100
+    Campaign(
+        name="Megaphone",
+        source_file=MEGAPHONE_CAMPAIGN_FILE,
+        output_file=MEGAPHONE_OUTPUT_FILE,
+        address_column="walletAddress",
+        transforms=[CapComponent("totalPoints", "referralPoints", 100)],
+        dedupe="before_filters",
+        filters=[
+            Threshold("totalPoints", ">", 205, "points <= 205 after referral cap")
+        ],
+        allocation=FixedAllocation(SOCIALS_ALLOCATION),
+    ),
+    # Feedback sprint participants only (not the oasis gathering): ARMA members
+    # with at least 100 points, of which those with exactly 300 points get 385 tokens
+    Campaign(
+        name="Community",
+        source_file=COMMUNITY_FILE,
+        output_file=COMMUNITY_OUTPUT_FILE,
+        address_column="eoa",
+        require_arma=True,
+        dedupe=None,
+        filters=[Threshold("points", ">=", 100, "points < 100")],
+        allocation=MatchAllocation("points", 300, 385, zero_reason="points != 300"),
+    ),
+]
+
+
+def checksum_discord_roles(cache):
     """
     Checksum addresses in the Discord role CSV file.
     """
     print("--- Checksuming Discord Roles ---")
     df = pd.read_csv(DISCORD_FILE)
-    df["Address"] = df["Address"].apply(lambda x: Web3.to_checksum_address(x))
+    df["Address"] = to_checksum_addresses(df["Address"], cache)
     df.to_csv(DISCORD_OUTPUT_FILE, index=False)
 
 
@@ -374,12 +136,15 @@ def main():
     """
     Main execution function that processes all five campaign allocations.
     """
-    calculate_arma_allocations()
-    calculate_layer3_allocations()
-    calculate_galxe_allocations()
-    calculate_megaphone_allocations()
-    calculate_community_allocations()
-    checksum_discord_roles()
+    arma_keys = load_address_keys(ARMA_FILE, "eoa")
+    drop_log = []
+    # One cache for the whole run: opening it checks the database file
+    with PersistentCache() as cache:
+        for campaign in CAMPAIGNS:
+            _, drops = run_campaign(campaign, cache, arma_keys)
+            drop_log.append(drops)
+        checksum_discord_roles(cache)
+    save_drop_log(drop_log)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,9 @@ import pandas as pd
 import numpy as np
 import json
 
+from eligibility_filter import build_filter, filter_contains_many
+from verification import REPORT_FILE, allocation_wei, verify
+
 # Output files from processing scripts
 ARMA_OUTPUT_FILE = "./processed/arma_allocations.csv"
 LAYER3_OUTPUT_FILE = "./processed/layer3_allocations.csv"
@@ -14,8 +17,9 @@ MEGAPHONE_OUTPUT_FILE = "./processed/megaphone_allocations.csv"
 TOTAL_OUTPUT_FILE = "./processed/total_allocations.csv"
 MERKLE_OUTPUT_FILE = "./processed/total_allocations_for_merkle.csv"
 ELIGIBILITY_OUTPUT_FILE = "./processed/eligibility.json"
+ELIGIBILITY_FILTER_OUTPUT_FILE = "./processed/eligibility_filters.json"
 
-TOTAL_SUPPLY = 1_000_000_000
+ELIGIBILITY_FILTER_FP_RATE = 0.01  # Target false-positive rate of the eligibility filters
 
 
 def main():
@@ -28,6 +32,7 @@ def main():
     3. Merges all allocations based on wallet addresses
     4. Calculates total token allocation for each address
     5. Saves the merged data to a new CSV file
+    6. Verifies row totals, category sums, the budget and the Merkle input (verification.py)
 
     The resulting file contains all unique addresses from all campaigns,
     with zero values for campaigns where an address didn't participate.
@@ -130,38 +135,17 @@ def main():
     print(f"Merged data saved to {TOTAL_OUTPUT_FILE}")
     print(f"Total rows in merged data: {len(merged_df)}")
 
-    # Calculate and display the sum of allocations for each campaign
-    campaign_sums = {
-        "ARMA": merged_df["ARMA"].sum(),
-        "Layer3": merged_df["Layer3"].sum(),
-        "Galxe": merged_df["Galxe"].sum(),
-        "Community": merged_df["Community"].sum(),
-        "Discord": merged_df["Discord"].sum(),
-        "Megaphone": merged_df["Megaphone"].sum(),
-        "Total": merged_df["Total"].sum(),
-    }
-
-    # Calculate category totals
-    socials_total = (
-        campaign_sums["Layer3"] + campaign_sums["Galxe"] + campaign_sums["Megaphone"]
-    )
-    community_total = campaign_sums["Community"] + campaign_sums["Discord"]
-
-    print("\nAllocation Summary:")
-    print("-" * 50)
-    for campaign, total in campaign_sums.items():
-        print(f"{campaign}: {total:,.0f} tokens ({total / TOTAL_SUPPLY:.3%})")
-    print("-" * 50)
-    print(
-        f"Socials (Layer3 + Galxe + Megaphone): {socials_total:,.0f} tokens ({socials_total / TOTAL_SUPPLY:.3%})"
-    )
-    print(
-        f"Community (Community + Discord): {community_total:,.0f} tokens ({community_total / TOTAL_SUPPLY:.3%})"
-    )
-    print("-" * 50)
-    print(
-        f"Total Allocation: {campaign_sums['Total']:,.0f} tokens ({campaign_sums['Total'] / TOTAL_SUPPLY:.3%})"
+    # Check totals, category sums, the budget and the Merkle input in one pass
+    report = verify(
+        "merge",
+        merged_df,
+        amounts=(
+            (merged_df["Address"], allocation_wei(merged_df["Total"])),
+            (merkle_df["Address"], merkle_df["Total"]),
+        ),
     )
+    if not report["passed"]:
+        raise ValueError(f"Merged allocations failed verification, see {REPORT_FILE}")
 
     # Create eligibility mapping
     create_eligibility_mapping(merged_df)
@@ -201,6 +185,46 @@ def create_eligibility_mapping(merged_df):
     print(f"Eligibility mapping saved to {ELIGIBILITY_OUTPUT_FILE}")
     print(f"Total addresses in eligibility mapping: {len(eligibility_mapping)}")
 
+    create_eligibility_filters(merged_df)
+
+
+def create_eligibility_filters(merged_df):
+    """
+    Creates a compact Bloom filter per eligibility category for client-side pre-checks.
+
+    A frontend can tell a visitor they are not eligible without downloading
+    eligibility.json: a negative lookup is always correct, a positive one is wrong
+    with probability ELIGIBILITY_FILTER_FP_RATE (checked in tests/test_eligibility_filter.py).
+
+    Args:
+        merged_df: DataFrame containing all addresses and their allocations from different campaigns
+    """
+    categories = {
+        "ARMA": merged_df["ARMA"] > 0,
+        "Socials": (merged_df["Layer3"] > 0)
+        | (merged_df["Galxe"] > 0)
+        | (merged_df["Megaphone"] > 0),
+        "Community": (merged_df["Community"] > 0) | (merged_df["Discord"] > 0),
+    }
+
+    filters = {}
+    for category, mask in categories.items():
+        members = merged_df.loc[mask, "Address"].tolist()
+        bloom = build_filter(members, ELIGIBILITY_FILTER_FP_RATE)
+        if not filter_contains_many(bloom, members).all():
+            raise ValueError(f"{category} eligibility filter is missing members")
+        filters[category] = bloom
+
+        print(
+            f"{category} filter: {len(members)} addresses, {bloom['m'] // 8:,} bytes, "
+            f"k={bloom['k']}"
+        )
+
+    with open(ELIGIBILITY_FILTER_OUTPUT_FILE, "w") as f:
+        json.dump(filters, f)
+
+    print(f"Eligibility filters saved to {ELIGIBILITY_FILTER_OUTPUT_FILE}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,20 @@
 from dataclasses import dataclass
 from pathlib import Path
+import argparse
 import csv
-from typing import List, Tuple
+import hashlib
+import os
+import shutil
+import textwrap
+from typing import List, Optional, Tuple
 import json
 from multiproof import StandardMerkleTree
-from eth_utils import is_checksum_address, to_checksum_address
+from eth_utils import to_checksum_address
+import pandas as pd
+
+from merkle_tree import build_tree, leaf_proof
+from persistent_cache import PersistentCache
+from verification import verify
 
 
 @dataclass
@@ -12,6 +22,79 @@ class AirdropConfig:
     input_file: Path
     output_file: Path
     proof_file: Path
+    multiproof_file: Path
+    checkpoint_dir: Path
+    proof_chunk_size: int = 10_000
+
+
+class CheckpointStore:
+    """
+    Checksummed outputs of each Merkle build phase, so an interrupted build can resume.
+
+    Phases run in PHASES order, followed by the proof chunks. A manifest records
+    the SHA-256 of every saved file and of the input file; a phase is only reused
+    if its file still matches, and all checkpoints are dropped when the input
+    changes. Saving a phase drops the checkpoints of every later phase.
+    """
+
+    PHASES = ["leaves", "leaf_hashes", "tree"]
+
+    def __init__(self, directory: Path, input_file: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_file = directory / "manifest.json"
+        input_sha256 = hashlib.sha256(input_file.read_bytes()).hexdigest()
+
+        self.manifest = {"input_sha256": input_sha256, "files": {}}
+        if self.manifest_file.exists():
+            with open(self.manifest_file) as file:
+                manifest = json.load(file)
+            if manifest.get("input_sha256") == input_sha256:
+                self.manifest = manifest
+            else:
+                print("Input file changed, discarding checkpoints")
+
+    def _order(self, name: str) -> int:
+        return self.PHASES.index(name) if name in self.PHASES else len(self.PHASES)
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    def load(self, name: str) -> Optional[bytes]:
+        """Return the saved data of a checkpoint, or None if it is missing or corrupted."""
+        sha256 = self.manifest["files"].get(name)
+        path = self.directory / name
+        if sha256 is None or not path.exists():
+            return None
+        data = path.read_bytes()
+        if hashlib.sha256(data).hexdigest() != sha256:
+            print(f"Checkpoint {name} failed its checksum, recomputing")
+            return None
+        return data
+
+    def save(self, name: str, data: bytes) -> None:
+        """Persist a checkpoint and invalidate everything derived from earlier state."""
+        order = self._order(name)
+        self.manifest["files"] = {
+            saved: sha256
+            for saved, sha256 in self.manifest["files"].items()
+            if self._order(saved) <= order
+        }
+        (self.directory / name).parent.mkdir(parents=True, exist_ok=True)
+        self._write_atomic(self.directory / name, data)
+        self.manifest["files"][name] = hashlib.sha256(data).hexdigest()
+        self._write_atomic(
+            self.manifest_file, json.dumps(self.manifest, indent=2).encode()
+        )
+
+    def clear(self) -> None:
+        """Delete every checkpoint once the build they belong to is complete."""
+        shutil.rmtree(self.directory)
 
 
 class AirdropMerkleGenerator:
@@ -19,31 +102,17 @@ class AirdropMerkleGenerator:
         self.config = config
         self.tree = None
 
-    def read_airdrop_data(self) -> List[Tuple[str, int]]:
+    def read_airdrop_data(self, cache: PersistentCache) -> List[Tuple[str, int]]:
         """Read and parse the airdrop CSV file."""
         if not self.config.input_file.exists():
             raise FileNotFoundError(f"Airdrop file not found: {self.config.input_file}")
 
-        values: List[Tuple[str, int]] = []
-        seen_addresses = set()
+        rows: List[Tuple[str, int]] = []
         with open(self.config.input_file, newline="") as csvfile:
             reader = csv.reader(csvfile)
             for row in reader:
                 try:
                     address = row[0]
-                    # Validate and convert to checksum address
-                    if not is_checksum_address(address):
-                        try:
-                            address = to_checksum_address(address)
-                        except ValueError as e:
-                            raise ValueError(
-                                f"Invalid Ethereum address format: {address}"
-                            ) from e
-
-                    # Check for duplicate addresses
-                    if address in seen_addresses:
-                        raise ValueError(f"Duplicate address found in CSV: {address}")
-                    seen_addresses.add(address)
 
                     # Validate amount
                     try:
@@ -61,50 +130,268 @@ class AirdropMerkleGenerator:
                             f"Invalid amount format in row {row}: {str(e)}"
                         ) from e
 
-                    values.append((address, amount))
+                    rows.append((address, amount))
                 except (IndexError, ValueError) as e:
                     raise ValueError(f"Invalid row format in CSV: {row}") from e
+
+        # Validate and convert to checksum addresses, reusing cached conversions
+        try:
+            addresses = cache.checksum_addresses([address for address, _ in rows])
+        except ValueError as e:
+            raise ValueError(f"Invalid Ethereum address format: {e}") from e
+
+        values: List[Tuple[str, int]] = []
+        seen_addresses = set()
+        for address, (_, amount) in zip(addresses, rows):
+            # Check for duplicate addresses
+            if address in seen_addresses:
+                raise ValueError(f"Duplicate address found in CSV: {address}")
+            seen_addresses.add(address)
+            values.append((address, amount))
         return values
 
-    def generate_tree(self, values: List[Tuple[str, int]]) -> StandardMerkleTree:
-        """Generate the Merkle tree from the provided values."""
-        return StandardMerkleTree.of(values, ["address", "uint256"])
+    def hash_leaves(
+        self, values: List[Tuple[str, int]], cache: PersistentCache
+    ) -> List[bytes]:
+        """Compute the leaf hash of each value, reusing cached leaf hashes."""
+        return cache.leaf_hashes(values)
+
+    def generate_tree(
+        self,
+        values: List[Tuple[str, int]],
+        leaf_hashes: List[bytes],
+        nodes: Optional[List[bytes]] = None,
+    ) -> StandardMerkleTree:
+        """Generate the Merkle tree from the provided values and their leaf hashes."""
+        return build_tree(values, leaf_hashes, nodes)
 
     def save_tree(self, tree: StandardMerkleTree) -> None:
         """Save the Merkle tree to a JSON file."""
         with open(self.config.output_file, "w") as file:
             json.dump(tree.to_json(), file, indent=2)
 
-    def generate_proof(self, tree: StandardMerkleTree) -> None:
-        """Generate the Merkle proof for each value in the tree."""
-        output = []
-        for i, leaf in enumerate(tree.values):
-            proof = tree.get_proof(i)
-            output.append(
-                {"address": leaf.value[0], "amount": leaf.value[1], "proof": proof}
-            )
+    def generate_proof(self, tree: StandardMerkleTree, store: CheckpointStore) -> None:
+        """
+        Generate the Merkle proof for each value in the tree.
+
+        Proofs are written in chunks of proof_chunk_size values; chunks saved by an
+        earlier, interrupted run are reused. The chunks are then joined into the
+        proof file.
+        """
+        chunk_size = self.config.proof_chunk_size
+        chunk_names = []
+        resumed = 0
+        for start in range(0, len(tree.values), chunk_size):
+            end = min(start + chunk_size, len(tree.values))
+            name = f"proofs/proof_{start:09d}-{end:09d}.json"
+            chunk_names.append(name)
+            if store.load(name) is not None:
+                resumed += 1
+                continue
+
+            output = []
+            for i in range(start, end):
+                leaf = tree.values[i]
+                proof = leaf_proof(tree, i)
+                output.append(
+                    {"address": leaf.value[0], "amount": leaf.value[1], "proof": proof}
+                )
+            store.save(name, json.dumps(output).encode())
+        if resumed:
+            print(f"Resumed {resumed} of {len(chunk_names)} proof chunks from checkpoint")
+
+        # Same layout as json.dump(all_proofs, file, indent=2), one chunk in memory at a time
         with open(self.config.proof_file, "w") as file:
-            json.dump(output, file, indent=2)
+            file.write("[")
+            separator = "\n"
+            for name in chunk_names:
+                for entry in json.loads(store.load(name)):
+                    file.write(separator + textwrap.indent(json.dumps(entry, indent=2), "  "))
+                    separator = ",\n"
+            file.write("\n]" if chunk_names else "]")
+
+    def load_tree(self) -> StandardMerkleTree:
+        """Load the Merkle tree previously saved by save_tree."""
+        if not self.config.output_file.exists():
+            raise FileNotFoundError(f"Merkle tree file not found: {self.config.output_file}")
+        with open(self.config.output_file) as file:
+            return StandardMerkleTree.from_json(json.load(file))
+
+    def read_claim_addresses(self, claims_file: Path) -> List[str]:
+        """Read the addresses to claim for, one per line (extra CSV columns are ignored)."""
+        if not claims_file.exists():
+            raise FileNotFoundError(f"Claims file not found: {claims_file}")
+
+        addresses: List[str] = []
+        with open(claims_file, newline="") as csvfile:
+            for row in csv.reader(csvfile):
+                if not row or not row[0].strip():
+                    continue
+                try:
+                    addresses.append(to_checksum_address(row[0].strip()))
+                except ValueError as e:
+                    raise ValueError(
+                        f"Invalid Ethereum address format: {row[0]}"
+                    ) from e
+        return addresses
+
+    def plan_batches(
+        self, tree: StandardMerkleTree, addresses: List[str], batch_size: int
+    ) -> List[List[int]]:
+        """
+        Group addresses into batches of value indices that sit close together in the tree.
+
+        Leaves that are adjacent in the tree share most of their ancestors, so sorting
+        the requested leaves by tree position and cutting the sorted run into batches
+        keeps the number of sibling hashes each multiproof has to carry low.
+        """
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be positive, got: {batch_size}")
+
+        # Tree values were checksummed by read_airdrop_data when the tree was built
+        value_index = {leaf.value[0]: i for i, leaf in enumerate(tree.values)}
+        indices: List[int] = []
+        seen_addresses = set()
+        for address in addresses:
+            if address not in value_index:
+                raise ValueError(f"Address not found in Merkle tree: {address}")
+            if address in seen_addresses:
+                raise ValueError(f"Duplicate address in claims: {address}")
+            seen_addresses.add(address)
+            indices.append(value_index[address])
+
+        indices.sort(key=lambda i: tree.values[i].tree_index, reverse=True)
+        return [
+            indices[start : start + batch_size]
+            for start in range(0, len(indices), batch_size)
+        ]
+
+    def generate_multi_proof(
+        self, tree: StandardMerkleTree, value_indices: List[int]
+    ) -> dict:
+        """Generate a multiproof covering the given values, in the layout expected by multiProofVerify."""
+        multi_proof = tree.get_multi_proof(value_indices)
+        return {
+            "leaves": [list(value) for value in multi_proof.leaves],
+            "proof": multi_proof.proof,
+            "proofFlags": multi_proof.proof_flags,
+        }
+
+    def generate_multi_proofs(
+        self, tree: StandardMerkleTree, addresses: List[str], batch_size: int
+    ) -> List[dict]:
+        """Plan claim batches for the addresses and save one multiproof per batch."""
+        batches = [
+            self.generate_multi_proof(tree, batch)
+            for batch in self.plan_batches(tree, addresses, batch_size)
+        ]
+        with open(self.config.multiproof_file, "w") as file:
+            json.dump({"root": tree.root, "batches": batches}, file, indent=2)
+        return batches
+
+    def verify_proof(self) -> dict:
+        """Checks that the proof file lists exactly the input addresses and wei amounts."""
+        rows = pd.read_csv(self.config.input_file, header=None, dtype=str)
+        with open(self.config.proof_file) as f:
+            proofs = json.load(f)
+        return verify(
+            "merkle",
+            amounts=(
+                (rows[0].str.strip().tolist(), rows[1].str.strip().tolist()),
+                (
+                    [entry["address"] for entry in proofs],
+                    [entry["amount"] for entry in proofs],
+                ),
+            ),
+        )
+
+    def process(self, cache: PersistentCache) -> str:
+        """
+        Process the airdrop data and return the Merkle root.
+
+        `cache` is the run's open PersistentCache, used for address checksums and
+        leaf hashes.
+
+        Each phase (validated leaves, leaf hashes, tree nodes, proof chunks) is
+        checkpointed, so a rerun after a failure resumes from the last complete one.
+        The checkpoints are deleted once the proof file has been verified.
+        """
+        store = CheckpointStore(self.config.checkpoint_dir, self.config.input_file)
+
+        data = store.load("leaves")
+        if data is None:
+            values = self.read_airdrop_data(cache)
+            store.save("leaves", json.dumps(values).encode())
+        else:
+            print("Resumed validated leaves from checkpoint")
+            values = [(address, amount) for address, amount in json.loads(data)]
+
+        data = store.load("leaf_hashes")
+        if data is None:
+            leaf_hashes = self.hash_leaves(values, cache)
+            store.save("leaf_hashes", b"".join(leaf_hashes))
+        else:
+            print("Resumed leaf hashes from checkpoint")
+            leaf_hashes = [data[i : i + 32] for i in range(0, len(data), 32)]
+
+        data = store.load("tree")
+        if data is None:
+            tree = self.generate_tree(values, leaf_hashes)
+            store.save("tree", b"".join(tree.tree))
+        else:
+            print("Resumed tree nodes from checkpoint")
+            nodes = [data[i : i + 32] for i in range(0, len(data), 32)]
+            tree = self.generate_tree(values, leaf_hashes, nodes)
 
-    def process(self) -> str:
-        """Process the airdrop data and return the Merkle root."""
-        values = self.read_airdrop_data()
-        tree = self.generate_tree(values)
         self.save_tree(tree)
-        self.generate_proof(tree)
+        self.generate_proof(tree, store)
+        if not self.verify_proof()["passed"]:
+            raise ValueError(f"Proof file does not match {self.config.input_file}")
+
+        # The proof chunks duplicate proof.json, keep them only until it is verified
+        store.clear()
         return tree.root
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the airdrop Merkle tree and proofs.")
+    parser.add_argument(
+        "--multiproof",
+        type=Path,
+        metavar="CLAIMS_FILE",
+        help="Generate batched multiproofs for the addresses in CLAIMS_FILE from the saved tree",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=200,
+        help="Maximum number of claims per multiproof batch (default: 200)",
+    )
+    args = parser.parse_args()
+
     config = AirdropConfig(
         input_file=Path("./processed/total_allocations_for_merkle.csv"),
         output_file=Path("./airdrop_proof/tree.json"),
         proof_file=Path("./airdrop_proof/proof.json"),
+        multiproof_file=Path("./airdrop_proof/multiproof.json"),
+        checkpoint_dir=Path("./airdrop_proof/checkpoints"),
     )
 
     generator = AirdropMerkleGenerator(config)
     try:
-        root = generator.process()
+        if args.multiproof:
+            tree = generator.load_tree()
+            addresses = generator.read_claim_addresses(args.multiproof)
+            batches = generator.generate_multi_proofs(tree, addresses, args.batch_size)
+            proof_nodes = sum(len(batch["proof"]) for batch in batches)
+            print(f"Merkle root: {tree.root}")
+            print(f"Claims: {len(addresses)} in {len(batches)} batches")
+            print(f"Total multiproof nodes: {proof_nodes}")
+            print(f"Multiproofs saved to {config.multiproof_file}")
+            return
+
+        with PersistentCache() as cache:
+            root = generator.process(cache)
         print(f"Merkle root: {root}")
     except Exception as e:
         print(f"Error processing airdrop: {e}")
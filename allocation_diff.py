@@ -0,0 +1,218 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constants import CAMPAIGN_COLUMNS
+
+# Drop log of the new run, written by process_data.py
+DROP_LOG_FILE = "./processed/drop_log.csv"
+
+# Diff output files
+CAMPAIGN_CHANGES_FILE = "./diff/campaign_changes.csv"
+ADDRESS_CHANGES_FILE = "./diff/address_changes.csv"
+
+
+def address_keys(addresses):
+    """
+    Packs hex addresses into (n, 3) uint64 sort keys.
+
+    Sorting fixed-width integers is far cheaper than sorting address strings,
+    and the keys ignore checksum casing.
+    """
+    raw = np.frombuffer(
+        bytes.fromhex("".join(address[2:] for address in addresses)), dtype=np.uint8
+    ).reshape(-1, 20)
+    padded = np.zeros((len(raw), 24), dtype=np.uint8)
+    padded[:, 4:] = raw
+    return padded.view(">u8").astype(np.uint64)
+
+
+def sorted_join(old_addresses, new_addresses):
+    """
+    Sort-merge joins two address lists on their packed keys.
+
+    Returns the union of addresses in key order and, for each input list, the
+    position of every address in that union.
+    """
+    keys = np.concatenate([address_keys(old_addresses), address_keys(new_addresses)])
+    order = np.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    slots = np.empty(len(keys), dtype=np.int64)
+    slots[order] = np.cumsum(first) - 1
+
+    addresses = np.concatenate([old_addresses, new_addresses])[order[first]]
+    return addresses, slots[: len(old_addresses)], slots[len(old_addresses) :]
+
+
+def align_runs(df_old, df_new):
+    """
+    Aligns two total_allocations tables on the sorted union of their addresses.
+
+    Returns the addresses and two (addresses x CAMPAIGN_COLUMNS) int64 matrices, with
+    zeros where a run has no row for an address.
+    """
+    old_addresses = np.asarray(df_old["Address"].tolist(), dtype=object)
+    new_addresses = np.asarray(df_new["Address"].tolist(), dtype=object)
+    addresses, old_slots, new_slots = sorted_join(old_addresses, new_addresses)
+
+    for name, run_addresses, slots in (
+        ("old", old_addresses, old_slots),
+        ("new", new_addresses, new_slots),
+    ):
+        duplicates = np.bincount(slots, minlength=len(addresses))[slots] > 1
+        if duplicates.any():
+            raise ValueError(
+                f"Duplicate addresses in {name} run: {run_addresses[duplicates][:5].tolist()}"
+            )
+
+    old = np.zeros((len(addresses), len(CAMPAIGN_COLUMNS)), dtype=np.int64)
+    old[old_slots] = df_old[CAMPAIGN_COLUMNS].to_numpy(dtype=np.int64)
+    new = np.zeros((len(addresses), len(CAMPAIGN_COLUMNS)), dtype=np.int64)
+    new[new_slots] = df_new[CAMPAIGN_COLUMNS].to_numpy(dtype=np.int64)
+    return addresses, old, new
+
+
+def summarize_campaigns(old, new):
+    """
+    Counts per campaign how many addresses gained, lost, or changed tokens.
+
+    - Gained: 0 tokens in the old run, more than 0 in the new run
+    - Lost: more than 0 tokens in the old run, 0 in the new run
+    - Increased / Decreased: tokens in both runs, amount changed
+    """
+    both = (old > 0) & (new > 0)
+    summary = pd.DataFrame(
+        {
+            "Campaign": CAMPAIGN_COLUMNS,
+            "Gained": ((old == 0) & (new > 0)).sum(axis=0),
+            "Lost": ((old > 0) & (new == 0)).sum(axis=0),
+            "Increased": (both & (new > old)).sum(axis=0),
+            "Decreased": (both & (new < old)).sum(axis=0),
+            "OldTokens": old.sum(axis=0),
+            "NewTokens": new.sum(axis=0),
+        }
+    )
+    summary["TokenDelta"] = summary["NewTokens"] - summary["OldTokens"]
+
+    total = summary.drop(columns="Campaign").sum()
+    total_old = old.sum(axis=1)
+    total_new = new.sum(axis=1)
+    total_both = (total_old > 0) & (total_new > 0)
+    total["Gained"] = ((total_old == 0) & (total_new > 0)).sum()
+    total["Lost"] = ((total_old > 0) & (total_new == 0)).sum()
+    total["Increased"] = (total_both & (total_new > total_old)).sum()
+    total["Decreased"] = (total_both & (total_new < total_old)).sum()
+    total["Campaign"] = "Total"
+    return pd.concat([summary, total.to_frame().T], ignore_index=True)
+
+
+def read_drop_log(path):
+    """Reads a drop log, or an empty one if the run did not write it."""
+    if path is None or not Path(path).exists():
+        return pd.DataFrame(columns=["Campaign", "Address", "Reason"])
+    return pd.read_csv(path).drop_duplicates(subset=["Campaign", "Address"])
+
+
+def address_changes(addresses, old, new, drop_log, old_drop_log):
+    """
+    Lists every (address, campaign) cell whose token amount changed.
+
+    Lost and decreased rows are explained by the new run's drop log, gained rows
+    by the old run's drop log. Addresses that lost tokens without any filter step
+    dropping them were not in the new raw export.
+    """
+    rows, columns = np.nonzero(old != new)
+    # Group by campaign; rows are already in address key order within each campaign
+    by_campaign = np.argsort(columns, kind="stable")
+    rows, columns = rows[by_campaign], columns[by_campaign]
+    changes = pd.DataFrame(
+        {
+            "Address": addresses[rows],
+            "Campaign": np.asarray(CAMPAIGN_COLUMNS)[columns],
+            "Old": old[rows, columns],
+            "New": new[rows, columns],
+        }
+    )
+    changes["Delta"] = changes["New"] - changes["Old"]
+    changes["Change"] = np.select(
+        [changes["Old"] == 0, changes["New"] == 0, changes["Delta"] > 0],
+        ["gained", "lost", "increased"],
+        default="decreased",
+    )
+
+    new_reasons = changes.merge(drop_log, on=["Campaign", "Address"], how="left")[
+        "Reason"
+    ]
+    old_reasons = changes.merge(old_drop_log, on=["Campaign", "Address"], how="left")[
+        "Reason"
+    ]
+    changes["Reason"] = np.select(
+        [
+            changes["Change"] == "gained",
+            new_reasons.notna(),
+            changes["Change"] == "lost",
+        ],
+        [
+            ("previously: " + old_reasons).fillna(""),
+            new_reasons,
+            "not in raw export",
+        ],
+        default="",
+    )
+    return changes
+
+
+def main():
+    """
+    Compares two total_allocations.csv runs and explains what changed.
+
+    Writes per-campaign change counts and token deltas to CAMPAIGN_CHANGES_FILE
+    and a per-address change log, with the filter step that dropped each
+    address, to ADDRESS_CHANGES_FILE.
+    """
+    parser = argparse.ArgumentParser(description="Diff two allocation runs.")
+    parser.add_argument("old", help="total_allocations.csv of the previous run")
+    parser.add_argument("new", help="total_allocations.csv of the new run")
+    parser.add_argument(
+        "--drop-log",
+        default=DROP_LOG_FILE,
+        help=f"Drop log of the new run (default: {DROP_LOG_FILE})",
+    )
+    parser.add_argument("--old-drop-log", help="Drop log of the previous run")
+    args = parser.parse_args()
+
+    df_old = pd.read_csv(args.old)
+    df_new = pd.read_csv(args.new)
+    addresses, old, new = align_runs(df_old, df_new)
+
+    summary = summarize_campaigns(old, new)
+    changes = address_changes(
+        addresses,
+        old,
+        new,
+        read_drop_log(args.drop_log),
+        read_drop_log(args.old_drop_log),
+    )
+
+    Path(CAMPAIGN_CHANGES_FILE).parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(CAMPAIGN_CHANGES_FILE, index=False)
+    changes.to_csv(ADDRESS_CHANGES_FILE, index=False)
+
+    print(f"Addresses in old run: {len(df_old)}")
+    print(f"Addresses in new run: {len(df_new)}")
+    print("\nCampaign Changes:")
+    print("-" * 50)
+    print(summary.to_string(index=False))
+    print("-" * 50)
+    print(f"Changed (address, campaign) entries: {len(changes)}")
+    print(f"Campaign changes saved to {CAMPAIGN_CHANGES_FILE}")
+    print(f"Address changes saved to {ADDRESS_CHANGES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from persistent_cache import PersistentCache
+from constants import TOTAL_SUPPLY
+
+
+@dataclass
+class Threshold:
+    """Keeps rows where `column` `op` `value`; `reason` describes the rows it drops."""
+
+    column: str
+    op: str  # One of ">=", ">", "==", "<=", "<"
+    value: float
+    reason: str
+
+
+@dataclass
+class CapComponent:
+    """
+    Caps the `component` part of a points total at `cap`.
+
+    total = total - component + min(component, cap)
+    """
+
+    total: str
+    component: str
+    cap: float
+
+
+@dataclass
+class FixedAllocation:
+    """Every qualifying participant receives `tokens`."""
+
+    tokens: int
+
+
+@dataclass
+class TieredAllocation:
+    """
+    Allocates tokens by the tier `column` falls into.
+
+    Tier i covers (bounds[i], bounds[i + 1]], the last tier everything above
+    bounds[-1]; values at or below bounds[0] receive 0 tokens.
+    """
+
+    column: str
+    bounds: List[float]
+    tokens: List[int]
+    zero_reason: str = "no matching tier"
+
+
+@dataclass
+class MatchAllocation:
+    """Participants whose `column` equals `value` receive `tokens`, others 0."""
+
+    column: str
+    value: float
+    tokens: int
+    zero_reason: str
+
+
+Allocation = Union[FixedAllocation, TieredAllocation, MatchAllocation]
+
+OPERATORS: Dict[str, Callable] = {
+    ">=": lambda column, value: column >= value,
+    ">": lambda column, value: column > value,
+    "==": lambda column, value: column == value,
+    "<=": lambda column, value: column <= value,
+    "<": lambda column, value: column < value,
+}
+
+
+@dataclass
+class Campaign:
+    """
+    Declarative definition of a campaign's eligibility and allocation rules.
+
+    Rows are processed in this order, mirroring how each campaign was specified:
+    rows without an address are dropped, then addresses missing from the ARMA
+    leaderboard (if `require_arma`), then duplicates (if `dedupe == "before_filters"`),
+    then each filter in turn, then duplicates (if `dedupe == "after_filters"`).
+    Deduplication keeps the first occurrence; `dedupe=None` keeps every row.
+    Transforms are applied to the point columns before any filter runs.
+    """
+
+    name: str
+    source_file: str
+    output_file: str
+    address_column: str
+    allocation: Allocation
+    transforms: List[CapComponent] = field(default_factory=list)
+    filters: List[Threshold] = field(default_factory=list)
+    require_arma: bool = False
+    dedupe: Optional[str] = "after_filters"
+
+
+@dataclass
+class Step:
+    """One compiled pass: a row mask, the drop reason to log, and the message to print."""
+
+    kind: str  # "missing", "arma", "dedupe" or "filter"
+    message: str
+    reason: Optional[str] = None
+    threshold: Optional[Threshold] = None
+
+
+def compile_campaign(campaign: Campaign) -> List[Step]:
+    """
+    Compiles a campaign into the ordered list of passes that decide which rows survive.
+
+    Every pass is evaluated as a boolean mask over the raw columns and combined
+    with the rows still alive, so filtering never copies the frame; only the
+    surviving rows are materialized, once, at the end.
+    """
+    if campaign.dedupe not in (None, "before_filters", "after_filters"):
+        raise ValueError(f"Unknown dedupe mode for {campaign.name}: {campaign.dedupe}")
+
+    steps = [Step("missing", f"dropping missing {campaign.address_column}")]
+    if campaign.require_arma:
+        steps.append(
+            Step("arma", "filtering for existence in ARMA", "not in ARMA leaderboard")
+        )
+    if campaign.dedupe == "before_filters":
+        steps.append(Step("dedupe", "removing duplicates"))
+    for threshold in campaign.filters:
+        if threshold.op not in OPERATORS:
+            raise ValueError(f"Unknown operator in {campaign.name}: {threshold.op}")
+        steps.append(
+            Step("filter", f"filtering {threshold.reason}", threshold.reason, threshold)
+        )
+    if campaign.dedupe == "after_filters":
+        steps.append(Step("dedupe", "removing duplicates"))
+    return steps
+
+
+def required_columns(campaign: Campaign) -> List[str]:
+    """Columns of the source file the compiled plan reads; everything else is skipped."""
+    columns = [campaign.address_column]
+    columns += [t.total for t in campaign.transforms]
+    columns += [t.component for t in campaign.transforms]
+    columns += [f.column for f in campaign.filters]
+    if not isinstance(campaign.allocation, FixedAllocation):
+        columns.append(campaign.allocation.column)
+    return list(dict.fromkeys(columns))
+
+
+def allocate(allocation: Allocation, df: pd.DataFrame) -> np.ndarray:
+    """Computes the token allocation of each surviving row."""
+    if isinstance(allocation, FixedAllocation):
+        return np.full(len(df), allocation.tokens, dtype=np.int64)
+    if isinstance(allocation, TieredAllocation):
+        tokens = np.asarray([0] + list(allocation.tokens), dtype=np.int64)
+        return tokens[np.searchsorted(allocation.bounds, df[allocation.column], side="left")]
+    return np.where(df[allocation.column] == allocation.value, allocation.tokens, 0)
+
+
+def address_keys(addresses: pd.Series) -> pd.Series:
+    """Normalized addresses: equal keys means equal checksum addresses."""
+    return addresses.astype("string").str.strip().str.lower()
+
+
+def run_campaign(
+    campaign: Campaign, cache: PersistentCache, arma_keys: Optional[pd.Index] = None
+):
+    """
+    Runs a campaign's compiled plan and saves its allocations to `output_file`.
+
+    Args:
+        campaign: The campaign definition
+        cache: The run's open checksum cache
+        arma_keys: Normalized ARMA leaderboard addresses, required if `require_arma`
+
+    Returns:
+        (allocations, drops): the Address/Token allocations and the
+        Campaign/Address/Reason log of addresses left without tokens by every row
+    """
+    print(f"--- Processing {campaign.name} Campaign ---")
+    df = pd.read_csv(campaign.source_file, usecols=required_columns(campaign))
+    print(f"Initial addresses: {len(df)}")
+
+    for transform in campaign.transforms:
+        component = df[transform.component]
+        df[transform.total] = (
+            df[transform.total] - component + component.clip(upper=transform.cap)
+        )
+
+    keys = address_keys(df[campaign.address_column])
+    alive = np.ones(len(df), dtype=bool)
+    dropped = []  # (row mask, reason) of steps that log their drops
+
+    for step in compile_campaign(campaign):
+        if step.kind == "missing":
+            keep = keys.notna().to_numpy() & (keys != "").fillna(False).to_numpy()
+        elif step.kind == "arma":
+            keep = keys.isin(arma_keys).to_numpy()
+        elif step.kind == "dedupe":
+            duplicated = np.zeros(len(df), dtype=bool)
+            duplicated[alive] = keys[alive].duplicated(keep=False).to_numpy()
+            if duplicated.any():
+                print(
+                    f"Duplicate addresses found in {campaign.name} campaign: {duplicated.sum()}"
+                )
+            keep = np.zeros(len(df), dtype=bool)
+            keep[alive] = ~keys[alive].duplicated(keep="first").to_numpy()
+        else:
+            threshold = step.threshold
+            keep = OPERATORS[threshold.op](df[threshold.column], threshold.value).to_numpy()
+
+        count_before = alive.sum()
+        if step.reason is not None:
+            dropped.append((alive & ~keep, step.reason))
+        alive &= keep
+        print(
+            f"Addresses after {step.message}: {alive.sum()} (dropped {count_before - alive.sum()})"
+        )
+
+    # Materialize the survivors once
+    result = df[alive]
+    tokens = allocate(campaign.allocation, result)
+    zero_reason = getattr(campaign.allocation, "zero_reason", None)
+    if zero_reason is not None:
+        zero_mask = np.zeros(len(df), dtype=bool)
+        zero_mask[np.flatnonzero(alive)[tokens == 0]] = True
+        dropped.append((zero_mask, zero_reason))
+
+    # Drops are per row; an address that kept another row with tokens was not dropped
+    paid = keys.isin(keys[np.flatnonzero(alive)[tokens > 0]]).to_numpy()
+    dropped = [(mask & ~paid, reason) for mask, reason in dropped]
+
+    # Checksum each distinct address once, survivors and logged drops together
+    logged = np.logical_or.reduce([mask for mask, _ in dropped] + [alive])
+    checksums = pd.Series(
+        cache.checksum_addresses(keys[logged].tolist()),
+        index=np.flatnonzero(logged),
+    )
+
+    allocations = pd.DataFrame(
+        {"Address": checksums.loc[np.flatnonzero(alive)].to_numpy(), "Token": tokens}
+    )
+    drops = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "Campaign": campaign.name,
+                    "Address": checksums.loc[np.flatnonzero(mask)].to_numpy(),
+                    "Reason": reason,
+                }
+            )
+            for mask, reason in dropped
+        ]
+        or [pd.DataFrame(columns=["Campaign", "Address", "Reason"])],
+        ignore_index=True,
+    )
+
+    print(f"{campaign.name} Campaign Final Count: {len(allocations)}")
+    print(f"{campaign.name} Campaign Total Tokens: {allocations['Token'].sum():,.2f}")
+    print(
+        f"{campaign.name} Campaign Total Tokens: {allocations['Token'].sum() / TOTAL_SUPPLY:.3%}"
+    )
+    allocations.to_csv(campaign.output_file, index=False)
+    return allocations, drops
+
+
+def load_address_keys(source_file: str, address_column: str) -> pd.Index:
+    """Reads the normalized addresses of a source file, e.g. for ARMA membership checks."""
+    addresses = pd.read_csv(source_file, usecols=[address_column])[address_column]
+    return pd.Index(address_keys(addresses).dropna().unique())
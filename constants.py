@@ -0,0 +1,7 @@
+# Token amounts shared by the processing, merge and verification scripts
+
+TOTAL_SUPPLY = 1_000_000_000  # Token supply, used for percentages
+AIRDROP_BUDGET = 13_850_190  # Tokens available to this distribution
+
+# Per-campaign token columns of total_allocations.csv
+CAMPAIGN_COLUMNS = ["ARMA", "Layer3", "Galxe", "Community", "Discord", "Megaphone"]
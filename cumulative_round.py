@@ -0,0 +1,204 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from merkle_tree import build_tree, leaf_proof
+from persistent_cache import PersistentCache
+from verification import allocation_wei, verify
+
+# Previous round outputs (copy the last round's cumulative files here)
+PREVIOUS_ALLOCATIONS_FILE = "./previous_round/cumulative_allocations.csv"
+
+# Current round merged allocations from merge_data.py
+ROUND_ALLOCATIONS_FILE = "./processed/total_allocations.csv"
+
+# Cumulative output files
+CUMULATIVE_OUTPUT_FILE = "./processed/cumulative_allocations.csv"
+CHANGES_OUTPUT_FILE = "./processed/cumulative_changes.csv"
+TREE_OUTPUT_FILE = "./airdrop_proof/cumulative_tree.json"
+PROOF_OUTPUT_FILE = "./airdrop_proof/cumulative_proof.json"
+
+WEI_SUFFIX = "000000000000000000"  # Tokens are whole numbers, 1 token = 1e18 wei
+
+
+def read_previous_allocations():
+    """
+    Reads the previous round's cumulative totals as an Address/Cumulative frame.
+
+    Accepts either a cumulative_allocations.csv written by this script or, for the
+    first cumulative round, a plain total_allocations.csv (its Total is used).
+    A missing file means there is no previous round.
+    """
+    path = Path(PREVIOUS_ALLOCATIONS_FILE)
+    if not path.exists():
+        print(f"No previous round found at {path}, starting from zero")
+        return pd.DataFrame({"Address": pd.Series(dtype=str), "Cumulative": 0})
+
+    df = pd.read_csv(path)
+    column = "Cumulative" if "Cumulative" in df.columns else "Total"
+    return df[["Address", column]].rename(columns={column: "Cumulative"})
+
+
+def whole_amounts(df, column, name):
+    """Returns a column as int64 tokens, rejecting fractional, negative or missing amounts."""
+    if pd.api.types.is_integer_dtype(df[column]):
+        values = df[column].to_numpy(dtype=np.int64)
+        bad = values < 0
+    else:
+        floats = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+        bad = ~(np.isfinite(floats) & (floats >= 0) & (np.floor(floats) == floats))
+        values = np.where(bad, 0, floats).astype(np.int64)
+    if bad.any():
+        raise ValueError(
+            f"{column} in {name} round must be whole non-negative tokens: "
+            f"{df.loc[bad, 'Address'].tolist()[:5]}"
+        )
+    return values
+
+
+def merge_rounds(df_previous, df_round, cache):
+    """
+    Joins the previous cumulative totals with this round's totals.
+
+    Addresses on both sides are converted to checksum format first, so a wallet
+    written in different casing in a hand-copied previous round is still one leaf.
+    Both sides are sorted by address and aligned with searchsorted, so the join is
+    a handful of vectorized passes regardless of how many addresses overlap.
+
+    Returns a frame sorted by Address with columns:
+    - Previous: cumulative amount already claimable after the previous round
+    - Round: amount allocated in this round
+    - Cumulative: Previous + Round, the amount committed to in the new tree
+    - Delta: Cumulative - Previous, what the contract pays on top of past claims
+    """
+    aligned = []
+    for name, df, column in (
+        ("previous", df_previous, "Cumulative"),
+        ("current", df_round, "Total"),
+    ):
+        addresses = pd.Series(
+            cache.checksum_addresses(df["Address"].astype(str).str.strip().tolist()),
+            dtype=object,
+        )
+        duplicates = addresses.duplicated()
+        if duplicates.any():
+            raise ValueError(
+                f"Duplicate addresses in {name} round: {addresses[duplicates].tolist()[:5]}"
+            )
+        aligned.append((addresses.to_numpy(dtype=str), whole_amounts(df, column, name)))
+
+    (previous_addresses, previous_amounts), (round_addresses, round_amounts) = aligned
+    addresses = np.union1d(previous_addresses, round_addresses)
+
+    previous = np.zeros(len(addresses), dtype=np.int64)
+    previous[np.searchsorted(addresses, previous_addresses)] = previous_amounts
+
+    current = np.zeros(len(addresses), dtype=np.int64)
+    current[np.searchsorted(addresses, round_addresses)] = round_amounts
+
+    cumulative = previous + current
+    return pd.DataFrame(
+        {
+            "Address": addresses,
+            "Previous": previous,
+            "Round": current,
+            "Cumulative": cumulative,
+            "Delta": cumulative - previous,
+        }
+    )
+
+
+def build_cumulative_tree(cumulative_df, cache):
+    """
+    Builds the Merkle tree over every cumulative (address, wei amount) leaf.
+
+    Leaf hashes come from the persistent leaf hash cache, whose entries are
+    integrity-checked, so leaves that did not change since an earlier round are
+    not hashed again.
+    """
+    values = [
+        (address, int(f"{cumulative}{WEI_SUFFIX}"))
+        for address, cumulative in zip(
+            cumulative_df["Address"], cumulative_df["Cumulative"]
+        )
+    ]
+    return build_tree(values, cache.leaf_hashes(values))
+
+
+def save_tree_and_proofs(tree):
+    """Saves the cumulative tree and the per-address proofs, and returns the proofs."""
+    Path(TREE_OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(TREE_OUTPUT_FILE, "w") as f:
+        json.dump(tree.to_json(), f, indent=2)
+
+    output = []
+    for i, leaf in enumerate(tree.values):
+        output.append(
+            {
+                "address": leaf.value[0],
+                "amount": leaf.value[1],
+                "proof": leaf_proof(tree, i),
+            }
+        )
+    with open(PROOF_OUTPUT_FILE, "w") as f:
+        json.dump(output, f, indent=2)
+    return output
+
+
+def main():
+    """
+    Produces the cumulative allocations and Merkle tree for a follow-up round.
+
+    In cumulative-claims mode every leaf commits to the total an address has
+    earned across all rounds. The claim contract tracks what each address has
+    already claimed and pays `cumulative - claimed`, so past rounds never need
+    their own tree again.
+
+    Outputs:
+    - cumulative_allocations.csv: every address with Previous, Round, Cumulative and Delta
+    - cumulative_changes.csv: only the addresses whose cumulative amount changed
+    - cumulative_tree.json / cumulative_proof.json: the new tree and its proofs
+    """
+    df_previous = read_previous_allocations()
+    df_round = pd.read_csv(ROUND_ALLOCATIONS_FILE)
+
+    # One cache for the whole run: opening it checks the database file
+    with PersistentCache() as cache:
+        cumulative_df = merge_rounds(df_previous, df_round, cache)
+        changes_df = cumulative_df[cumulative_df["Delta"] != 0]
+        tree = build_cumulative_tree(cumulative_df, cache)
+
+    print(f"Addresses in previous round: {len(df_previous)}")
+    print(f"Addresses in this round: {len(df_round)}")
+    print(f"Addresses in cumulative tree: {len(cumulative_df)}")
+    print(f"Addresses with a changed cumulative amount: {len(changes_df)}")
+    print(f"Tokens added this round: {changes_df['Delta'].sum():,.0f}")
+    print(f"Cumulative tokens: {cumulative_df['Cumulative'].sum():,.0f}")
+
+    cumulative_df.to_csv(CUMULATIVE_OUTPUT_FILE, index=False)
+    changes_df.to_csv(CHANGES_OUTPUT_FILE, index=False)
+
+    proofs = save_tree_and_proofs(tree)
+    report = verify(
+        "cumulative",
+        proofs=(tree.root, proofs),
+        amounts=(
+            (cumulative_df["Address"], allocation_wei(cumulative_df["Cumulative"])),
+            (
+                [entry["address"] for entry in proofs],
+                [entry["amount"] for entry in proofs],
+            ),
+        ),
+    )
+    if not report["passed"]:
+        raise ValueError(f"Cumulative proofs do not match {CUMULATIVE_OUTPUT_FILE}")
+
+    print(f"Cumulative Merkle root: {tree.root}")
+    print(f"Cumulative allocations saved to {CUMULATIVE_OUTPUT_FILE}")
+    print(f"Changed rows saved to {CHANGES_OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import base64
+import math
+
+import numpy as np
+from eth_utils import keccak
+
+# Bloom filter layout (reproduce this exactly in client lookups):
+# - h = keccak256(20 raw address bytes)
+# - h1 = uint32 big-endian of h[0:4], h2 = uint32 big-endian of h[4:8] | 1
+# - probe i (0 <= i < k) checks bit (h1 + i * h2) mod m
+# - bit j is bit (j % 8), least significant first, of byte j // 8 in `bits`
+
+
+def _hash_pairs(addresses):
+    """Returns the (h1, h2) probe hashes of each address as uint64 arrays."""
+    digests = b"".join(keccak(bytes.fromhex(address[2:]))[:8] for address in addresses)
+    words = np.frombuffer(digests, dtype=">u4").reshape(-1, 2).astype(np.uint64)
+    return words[:, 0], words[:, 1] | 1
+
+
+def _bit_indices(addresses, m, k):
+    """Returns the (addresses x k) bit positions probed for each address."""
+    h1, h2 = _hash_pairs(addresses)
+    probes = np.arange(k, dtype=np.uint64)
+    return (h1[:, None] + probes[None, :] * h2[:, None]) % np.uint64(m)
+
+
+def build_filter(addresses, fp_rate):
+    """
+    Builds a Bloom filter over the addresses with the given false-positive rate.
+
+    Returns a JSON-serializable dict with the item count `n`, bit count `m`,
+    probe count `k`, target `fp_rate` and the base64-encoded `bits`.
+    """
+    n = len(addresses)
+    m = max(8, math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2))
+    m = (m + 7) // 8 * 8
+    k = max(1, round(m / max(n, 1) * math.log(2)))
+
+    bits = np.zeros(m, dtype=bool)
+    if n:
+        bits[_bit_indices(addresses, m, k).ravel()] = True
+    return {
+        "n": n,
+        "m": m,
+        "k": k,
+        "fp_rate": fp_rate,
+        "bits": base64.b64encode(np.packbits(bits, bitorder="little").tobytes()).decode(),
+    }
+
+
+def filter_contains_many(bloom, addresses):
+    """Vectorized membership check, returns a boolean array."""
+    if len(addresses) == 0:
+        return np.zeros(0, dtype=bool)
+    bits = np.unpackbits(
+        np.frombuffer(base64.b64decode(bloom["bits"]), dtype=np.uint8),
+        bitorder="little",
+    ).astype(bool)
+    return bits[_bit_indices(addresses, bloom["m"], bloom["k"])].all(axis=1)
+
+
+def filter_contains(bloom, address):
+    """
+    Reference lookup: False means the address is definitely not in the category,
+    True means it is, up to the filter's false-positive rate.
+    """
+    bits = base64.b64decode(bloom["bits"])
+    digest = keccak(bytes.fromhex(address[2:]))
+    h1 = int.from_bytes(digest[0:4], "big")
+    h2 = int.from_bytes(digest[4:8], "big") | 1
+    for i in range(bloom["k"]):
+        j = (h1 + i * h2) % bloom["m"]
+        if not bits[j // 8] >> (j % 8) & 1:
+            return False
+    return True
+
+
+def measure_false_positive_rate(bloom, members, samples=100_000, seed=0):
+    """Measures the real false-positive rate on random addresses outside `members`."""
+    rng = np.random.default_rng(seed)
+    member_set = {address.lower() for address in members}
+    candidates = ["0x" + rng.bytes(20).hex() for _ in range(samples)]
+    non_members = [address for address in candidates if address not in member_set]
+    return float(filter_contains_many(bloom, non_members).mean())
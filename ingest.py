@@ -0,0 +1,260 @@
+import asyncio
+import csv
+import json
+import os
+import random
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+# Raw campaign files read by process_data.py
+GALXE_FILE = "./data/galxe_campaign.csv"
+LAYER3_FILE = "./data/layer3_campaign.csv"
+MEGAPHONE_CAMPAIGN_FILE = "./data/megaphone_campaign.csv"
+
+# Partial downloads and cursors, kept until a source completes
+INGEST_STATE_DIR = "./data/.ingest"
+
+PAGE_SIZE = 1000
+MAX_CONNECTIONS = 16  # Shared by all sources
+REQUESTS_PER_SECOND = 10.0  # Per source
+MAX_RETRIES = 6
+REQUEST_TIMEOUT = 60  # Seconds
+
+
+@dataclass
+class CampaignSource:
+    """
+    A paginated participant endpoint and the raw CSV schema it is written to.
+
+    Endpoints are read from the `url_env` environment variable; several URLs
+    (e.g. one per quest) can be given comma-separated and are fetched
+    concurrently. Each endpoint must accept `limit` and `cursor` query
+    parameters and return `{"data": [...], "next_cursor": ...}`, with a null
+    cursor on the last page. `fields` maps each CSV column to a record field.
+    """
+
+    name: str
+    url_env: str
+    output_file: str
+    fields: Dict[str, str]
+
+    @property
+    def api_key_env(self) -> str:
+        return f"{self.name.upper()}_API_KEY"
+
+
+SOURCES = [
+    CampaignSource(
+        name="galxe",
+        url_env="GALXE_API_URL",
+        output_file=GALXE_FILE,
+        fields={
+            "Wallet_20_Address": "address",
+            "Address_20_Type": "addressType",
+            "Point": "points",
+            "Ranking": "rank",
+        },
+    ),
+    CampaignSource(
+        name="layer3",
+        url_env="LAYER3_API_URL",
+        output_file=LAYER3_FILE,
+        fields={"Quest": "quest", "UserAddress": "address"},
+    ),
+    CampaignSource(
+        name="megaphone",
+        url_env="MEGAPHONE_API_URL",
+        output_file=MEGAPHONE_CAMPAIGN_FILE,
+        fields={
+            "walletAddress": "walletAddress",
+            "totalPoints": "totalPoints",
+            "referralPoints": "referralPoints",
+        },
+    ),
+]
+
+
+class RateLimiter:
+    """Spaces out requests so a source never exceeds `rate` requests per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            delay = self.next_slot - loop.time()
+            self.next_slot = max(self.next_slot, loop.time()) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RetryableError(Exception):
+    """A response worth retrying (rate limited or server error)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EndpointStream:
+    """
+    Downloads one paginated endpoint into a part file, resumable by cursor.
+
+    After every page the rows are flushed to disk and the cursor and file
+    offset are saved. A restarted run truncates the part file to the last saved
+    offset, dropping any half-written page, and continues from the saved cursor.
+    """
+
+    def __init__(self, source: CampaignSource, url: str, index: int):
+        self.source = source
+        self.url = url
+        state_dir = Path(INGEST_STATE_DIR)
+        self.part_file = state_dir / f"{source.name}-{index}.csv"
+        self.state_file = state_dir / f"{source.name}-{index}.json"
+        self.state = {"url": url, "cursor": None, "offset": 0, "rows": 0, "done": False}
+
+    def load_state(self) -> None:
+        """Resume from the saved state if it belongs to the same endpoint."""
+        if not self.state_file.exists() or not self.part_file.exists():
+            return
+        with open(self.state_file) as f:
+            state = json.load(f)
+        if state.get("url") != self.url:
+            print(f"[{self.source.name}] Endpoint changed, restarting {self.url}")
+            return
+        self.state = state
+        if not state["done"]:
+            print(
+                f"[{self.source.name}] Resuming {self.url} after {state['rows']} rows"
+            )
+
+    def save_state(self) -> None:
+        temp_file = self.state_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(self.state, f)
+        os.replace(temp_file, self.state_file)
+
+    async def fetch_page(
+        self, session: aiohttp.ClientSession, limiter: RateLimiter
+    ) -> dict:
+        """Fetch the page at the current cursor, retrying transient failures with backoff."""
+        params = {"limit": PAGE_SIZE}
+        if self.state["cursor"] is not None:
+            params["cursor"] = self.state["cursor"]
+        headers = {}
+        api_key = os.environ.get(self.source.api_key_env)
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        for attempt in range(MAX_RETRIES + 1):
+            await limiter.wait()
+            try:
+                async with session.get(self.url, params=params, headers=headers) as response:
+                    if response.status == 429 or response.status >= 500:
+                        retry_after = response.headers.get("Retry-After")
+                        raise RetryableError(
+                            f"HTTP {response.status}",
+                            float(retry_after) if retry_after else None,
+                        )
+                    response.raise_for_status()
+                    return await response.json()
+            except (RetryableError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                retry_after = getattr(e, "retry_after", None)
+                delay = retry_after or min(2**attempt, 30) * (0.5 + random.random())
+                print(
+                    f"[{self.source.name}] {str(e) or type(e).__name__} at cursor {self.state['cursor']}, retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def run(self, session: aiohttp.ClientSession, limiter: RateLimiter) -> int:
+        """Download every remaining page and return the number of rows in the part file."""
+        self.load_state()
+        if self.state["done"]:
+            return self.state["rows"]
+
+        with open(self.part_file, "a+", newline="") as f:
+            f.truncate(self.state["offset"])
+            writer = csv.writer(f)
+            while True:
+                page = await self.fetch_page(session, limiter)
+                records = page["data"]
+                writer.writerows(
+                    [record.get(field) for field in self.source.fields.values()]
+                    for record in records
+                )
+                f.flush()
+                os.fsync(f.fileno())
+
+                self.state["rows"] += len(records)
+                self.state["offset"] = f.tell()
+                self.state["cursor"] = page.get("next_cursor")
+                self.state["done"] = self.state["cursor"] is None
+                self.save_state()
+                if self.state["done"]:
+                    return self.state["rows"]
+
+
+async def ingest_source(
+    source: CampaignSource, urls: List[str], session: aiohttp.ClientSession
+) -> None:
+    """Fetch all endpoints of a source concurrently, then assemble its raw CSV."""
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
+    streams = [EndpointStream(source, url, i) for i, url in enumerate(urls)]
+    rows = await asyncio.gather(*(stream.run(session, limiter) for stream in streams))
+
+    # Write to a temporary file first so a failed run never leaves a truncated export
+    temp_file = Path(f"{source.output_file}.tmp")
+    with open(temp_file, "w", newline="") as out:
+        csv.writer(out).writerow(source.fields.keys())
+        for stream in streams:
+            with open(stream.part_file, newline="") as part:
+                shutil.copyfileobj(part, out)
+    os.replace(temp_file, source.output_file)
+
+    for stream in streams:
+        stream.part_file.unlink()
+        stream.state_file.unlink()
+    print(f"[{source.name}] Saved {sum(rows)} rows to {source.output_file}")
+
+
+async def ingest(sources: List[CampaignSource]) -> None:
+    """Fetch every configured source concurrently through one pooled HTTP client."""
+    configured = []
+    for source in sources:
+        urls = [url.strip() for url in os.environ.get(source.url_env, "").split(",") if url.strip()]
+        if urls:
+            configured.append((source, urls))
+        else:
+            print(f"[{source.name}] {source.url_env} not set, skipping")
+
+    Path(INGEST_STATE_DIR).mkdir(parents=True, exist_ok=True)
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(
+            *(ingest_source(source, urls, session) for source, urls in configured)
+        )
+
+
+def main():
+    """
+    Downloads the raw Galxe, Layer3 and Megaphone exports into data/.
+
+    Endpoints are configured through GALXE_API_URL, LAYER3_API_URL and
+    MEGAPHONE_API_URL (and optional <NAME>_API_KEY bearer tokens). An
+    interrupted run picks up from the last saved page when started again.
+    """
+    asyncio.run(ingest(SOURCES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from typing import List, Optional, Sequence, Tuple
+
+from eth_utils import keccak
+from multiproof import StandardMerkleTree
+from multiproof.bytes import to_hex
+from multiproof.core import get_proof
+from multiproof.standard import LeafValue, standard_leaf_hash
+
+LEAF_ENCODING = ["address", "uint256"]
+
+
+def hash_leaves(values: Sequence[Tuple[str, int]]) -> List[bytes]:
+    """Compute the standard (double keccak) leaf hash of each (address, amount) value."""
+    return [standard_leaf_hash(value, LEAF_ENCODING) for value in values]
+
+
+def make_tree(leaves: List[bytes]) -> List[bytes]:
+    """
+    Build the flat tree array from sorted leaf hashes.
+
+    Produces the same layout as multiproof.core.make_merkle_tree, but compares
+    sibling hashes with native bytes ordering instead of a Python byte loop.
+    """
+    if len(leaves) == 0:
+        raise ValueError("Expected non-zero number of leaves")
+
+    tree: List[bytes] = [b""] * (2 * len(leaves) - 1)
+    for index, leaf in enumerate(leaves):
+        tree[len(tree) - 1 - index] = leaf
+
+    for i in range(len(tree) - 1 - len(leaves), -1, -1):
+        left = tree[2 * i + 1]
+        right = tree[2 * i + 2]
+        tree[i] = keccak(left + right) if left < right else keccak(right + left)
+    return tree
+
+
+def build_tree(
+    values: List[Tuple[str, int]],
+    leaf_hashes: List[bytes],
+    nodes: Optional[List[bytes]] = None,
+) -> StandardMerkleTree:
+    """
+    Build a StandardMerkleTree from values whose leaf hashes are already known.
+
+    The result is identical to StandardMerkleTree.of(values, LEAF_ENCODING), but no
+    leaf is hashed again, so callers can reuse hashes from a previous run. If the
+    flat tree array from an earlier build is given as `nodes`, no hashing is done.
+    """
+    if len(values) != len(leaf_hashes):
+        raise ValueError(
+            f"Got {len(leaf_hashes)} leaf hashes for {len(values)} values"
+        )
+
+    # Stable sort, matching the tie-breaking of StandardMerkleTree.of
+    order = sorted(range(len(values)), key=leaf_hashes.__getitem__)
+    if nodes is None:
+        tree = make_tree([leaf_hashes[i] for i in order])
+    else:
+        tree = nodes
+        if len(tree) != 2 * len(values) - 1 or any(
+            tree[len(tree) - 1 - leaf_index] != leaf_hashes[value_index]
+            for leaf_index, value_index in enumerate(order)
+        ):
+            raise ValueError("Tree nodes do not match the leaf hashes")
+
+    indexed_values = [LeafValue(value=value, tree_index=0) for value in values]
+    for leaf_index, value_index in enumerate(order):
+        indexed_values[value_index].tree_index = len(tree) - leaf_index - 1
+
+    # Bypass __init__, which re-hashes every value to fill the lookup table
+    merkle_tree = StandardMerkleTree.__new__(StandardMerkleTree)
+    merkle_tree.tree = tree
+    merkle_tree.values = indexed_values
+    merkle_tree.leaf_encoding = LEAF_ENCODING
+    merkle_tree._hash_lookup = {
+        to_hex(leaf_hash): index for index, leaf_hash in enumerate(leaf_hashes)
+    }
+    return merkle_tree
+
+
+def leaf_proof(tree: StandardMerkleTree, value_index: int) -> List[str]:
+    """Return the proof for a value of a tree built by build_tree."""
+    tree_index = tree.values[value_index].tree_index
+    return [to_hex(node) for node in get_proof(tree.tree, tree_index)]
+
+
+def process_proof(leaf_hash: bytes, proof: List[str]) -> bytes:
+    """Fold a leaf hash with its proof nodes into the root it proves against."""
+    node = leaf_hash
+    for sibling_hex in proof:
+        sibling = bytes.fromhex(sibling_hex[2:])
+        node = keccak(node + sibling) if node < sibling else keccak(sibling + node)
+    return node
@@ -0,0 +1,80 @@
+import argparse
+import hashlib
+import random
+
+from aiohttp import web
+
+# Deterministic fake participants, one generator per endpoint path
+RECORD_FACTORIES = {
+    "galxe": lambda i, address: {
+        "address": address,
+        "addressType": "EVM",
+        "points": (i * 37) % 500,
+        "rank": i + 1,
+    },
+    "layer3": lambda i, address: {"quest": "Mode DeFAI Genesis: ARMA", "address": address},
+    "megaphone": lambda i, address: {
+        "walletAddress": address,
+        "totalPoints": (i * 53) % 600,
+        "referralPoints": (i * 17) % 300,
+    },
+}
+
+
+def fake_address(source, i):
+    return "0x" + hashlib.sha256(f"{source}:{i}".encode()).hexdigest()[:40]
+
+
+def make_app(rows, failure_rate):
+    """
+    Builds a local stand-in for the campaign participant APIs.
+
+    Serves GET /{galxe,layer3,megaphone}?limit=N&cursor=C with `rows` records per
+    endpoint in the format ingest.py expects, and fails a `failure_rate` share
+    of requests with 429 or 503 to exercise its retries.
+    """
+
+    async def participants(request):
+        source = request.match_info["source"]
+        if source not in RECORD_FACTORIES:
+            raise web.HTTPNotFound()
+
+        if random.random() < failure_rate:
+            if random.random() < 0.5:
+                return web.Response(status=429, headers={"Retry-After": "1"})
+            return web.Response(status=503)
+
+        limit = min(int(request.query.get("limit", 1000)), 10_000)
+        start = int(request.query.get("cursor", 0))
+        end = min(start + limit, rows)
+        factory = RECORD_FACTORIES[source]
+        return web.json_response(
+            {
+                "data": [factory(i, fake_address(source, i)) for i in range(start, end)],
+                "next_cursor": str(end) if end < rows else None,
+            }
+        )
+
+    app = web.Application()
+    app.router.add_get("/{source}", participants)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock campaign participant APIs.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--rows", type=int, default=100_000, help="Records per endpoint (default: 100000)"
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.02,
+        help="Share of requests answered with 429/503 (default: 0.02)",
+    )
+    args = parser.parse_args()
+    web.run_app(make_app(args.rows, args.failure_rate), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from eth_utils import to_checksum_address
+
+from merkle_tree import hash_leaves
+
+CACHE_DIR = "./.cache"
+CACHE_FILE_NAME = "airdrop_cache.sqlite"
+MAX_ENTRIES = 5_000_000  # Per table, least recently used entries are evicted first
+SCHEMA_VERSION = "2"
+
+
+def checksum_check(address: str, checksum: str) -> int:
+    """Integrity check value stored next to each cached checksum address."""
+    return zlib.crc32(f"{address}:{checksum}".encode())
+
+
+def leaf_check(address: str, amount: str, leaf_hash: bytes) -> int:
+    """Integrity check value stored next to each cached leaf hash."""
+    return zlib.crc32(f"{address}:{amount}:".encode() + leaf_hash)
+
+
+class PersistentCache:
+    """
+    On-disk cache of checksum addresses and Merkle leaf hashes shared across runs.
+
+    Maps lowercase address -> checksum address and (address, amount) -> leaf hash
+    in a SQLite file under CACHE_DIR. Every entry is checked when read, and a
+    corrupted entry or database is recomputed rather than trusted. Each open is a
+    new generation, so a script opens one cache per run and passes it to every
+    step: entries are then evicted by the run that last used them. On close,
+    tables larger than max_entries lose their least recently used entries.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = MAX_ENTRIES):
+        self.path = Path(cache_dir) / CACHE_FILE_NAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.inserted = False  # Tables can only outgrow max_entries through inserts
+        self.connection = self._connect()
+        self.generation = self._next_generation()
+
+    def __enter__(self) -> "PersistentCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache, starting a fresh one if the file is corrupted or outdated."""
+        try:
+            connection = self._open_database()
+        except sqlite3.DatabaseError as e:
+            print(f"Discarding unusable cache {self.path}: {e}")
+            for path in self.path.parent.glob(f"{self.path.name}*"):
+                path.unlink()
+            connection = self._open_database()
+        return connection
+
+    def _open_database(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if connection.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+            connection.close()
+            raise sqlite3.DatabaseError("integrity check failed")
+
+        connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS checksums (
+                address TEXT PRIMARY KEY,
+                checksum TEXT NOT NULL,
+                checkvalue INTEGER NOT NULL,
+                used INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leaf_hashes (
+                address TEXT NOT NULL,
+                amount TEXT NOT NULL,
+                hash BLOB NOT NULL,
+                checkvalue INTEGER NOT NULL,
+                used INTEGER NOT NULL,
+                PRIMARY KEY (address, amount)
+            );
+            """
+        )
+        version = connection.execute(
+            "SELECT value FROM meta WHERE key = 'schema_version'"
+        ).fetchone()
+        if version is not None and version[0] != SCHEMA_VERSION:
+            connection.close()
+            raise sqlite3.DatabaseError(f"unsupported schema version {version[0]}")
+        connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (SCHEMA_VERSION,)
+        )
+        return connection
+
+    def _next_generation(self) -> int:
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'generation'"
+        ).fetchone()
+        generation = int(row[0]) + 1 if row else 1
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(generation),)
+        )
+        return generation
+
+    def _load_lookup(self, keys: List[tuple], columns: List[str]) -> None:
+        """Fill the temporary lookup table with the requested keys."""
+        self.connection.execute("DROP TABLE IF EXISTS temp.lookup")
+        self.connection.execute(
+            f"CREATE TEMP TABLE lookup ({', '.join(f'{c} TEXT' for c in columns)})"
+        )
+        self.connection.executemany(
+            f"INSERT INTO lookup VALUES ({', '.join('?' * len(columns))})", keys
+        )
+
+    def checksum_addresses(self, addresses: Sequence[str]) -> List[str]:
+        """
+        Convert addresses to checksum format, reusing cached conversions.
+
+        Raises ValueError for invalid addresses, like to_checksum_address.
+        """
+        keys = [address.lower() for address in addresses]
+        self._load_lookup([(key,) for key in set(keys)], ["address"])
+        rows = self.connection.execute(
+            "SELECT c.address, c.checksum, c.checkvalue FROM checksums c "
+            "JOIN lookup l ON c.address = l.address"
+        ).fetchall()
+        # A valid entry is the same address, with casing matching its check value
+        cached = {
+            address: checksum
+            for address, checksum, checkvalue in rows
+            if len(checksum) == 42
+            and checksum.lower() == address
+            and checksum_check(address, checksum) == checkvalue
+        }
+        self.connection.execute(
+            "UPDATE checksums SET used = ? WHERE address IN (SELECT address FROM lookup)",
+            (self.generation,),
+        )
+
+        missing = {}
+        for address, key in zip(addresses, keys):
+            if key not in cached and key not in missing:
+                missing[key] = to_checksum_address(address)
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?)",
+            [
+                (key, checksum, checksum_check(key, checksum), self.generation)
+                for key, checksum in missing.items()
+            ],
+        )
+        self.inserted |= bool(missing)
+        self.connection.commit()
+
+        cached.update(missing)
+        return [cached[key] for key in keys]
+
+    def leaf_hashes(self, values: Sequence[Tuple[str, int]]) -> List[bytes]:
+        """Return the standard Merkle leaf hash of each (address, amount), reusing cached hashes."""
+        keys = [(address.lower(), str(amount)) for address, amount in values]
+        self._load_lookup(keys, ["address", "amount"])
+        rows = self.connection.execute(
+            "SELECT h.address, h.amount, h.hash, h.checkvalue FROM leaf_hashes h "
+            "JOIN lookup l ON h.address = l.address AND h.amount = l.amount"
+        ).fetchall()
+        cached = {
+            (address, amount): leaf_hash
+            for address, amount, leaf_hash, checkvalue in rows
+            if len(leaf_hash) == 32 and leaf_check(address, amount, leaf_hash) == checkvalue
+        }
+        self.connection.execute(
+            "UPDATE leaf_hashes SET used = ? WHERE (address, amount) IN "
+            "(SELECT address, amount FROM lookup)",
+            (self.generation,),
+        )
+
+        missing_indices = [i for i, key in enumerate(keys) if key not in cached]
+        computed = hash_leaves([values[i] for i in missing_indices])
+        missing = {keys[i]: leaf_hash for i, leaf_hash in zip(missing_indices, computed)}
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO leaf_hashes VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    address,
+                    amount,
+                    leaf_hash,
+                    leaf_check(address, amount, leaf_hash),
+                    self.generation,
+                )
+                for (address, amount), leaf_hash in missing.items()
+            ],
+        )
+        self.inserted |= bool(missing)
+        self.connection.commit()
+
+        print(
+            f"Leaf hashes from cache: {len(keys) - len(missing_indices)}, computed: {len(missing_indices)}"
+        )
+        cached.update(missing)
+        return [cached[key] for key in keys]
+
+    def evict(self) -> None:
+        """Drop the least recently used entries of tables above max_entries."""
+        if not self.inserted:
+            return
+        for table in ("checksums", "leaf_hashes"):
+            count = self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            if count > self.max_entries:
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE rowid IN "
+                    f"(SELECT rowid FROM {table} ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+        self.connection.commit()
+
+    def close(self) -> None:
+        """Evict stale entries and close the cache."""
+        self.evict()
+        self.connection.close()
@@ -0,0 +1,241 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Merkle input from merge_data.py (Address, wei amount, no header)
+MERKLE_INPUT_FILE = "./processed/total_allocations_for_merkle.csv"
+
+# Output directory for batch calldata files and the plan summary
+DISTRIBUTION_DIR = "./distribution"
+PLAN_OUTPUT_FILE = "./distribution/plan.csv"
+
+# disperseToken(address token, address[] recipients, uint256[] values)
+DISPERSE_TOKEN_SELECTOR = bytes.fromhex("c73a2d60")
+
+# Gas model
+TX_BASE_GAS = 21_000  # Intrinsic transaction cost
+BATCH_OVERHEAD_GAS = 35_000  # Contract call, allowance check and loop setup
+TRANSFER_GAS = 30_000  # Cold transferFrom into a fresh balance slot
+CALLDATA_ZERO_BYTE_GAS = 4
+CALLDATA_NONZERO_BYTE_GAS = 16
+
+# Default batch limits
+MAX_BATCH_GAS = 15_000_000  # Half of a 30M block
+MAX_CALLDATA_BYTES = 120_000  # Stays under the 128 KB transaction size limit
+GAS_PRICE_GWEI = 1.0
+
+HEADER_BYTES = 4 + 5 * 32  # Selector, token, two array offsets and two array lengths
+RECIPIENT_BYTES = 2 * 32  # One address word and one amount word
+
+PLAN_COLUMNS = [
+    "Batch",
+    "Recipients",
+    "Tokens",
+    "CalldataBytes",
+    "GasEstimate",
+    "CostEth",
+    "FirstAddress",
+    "LastAddress",
+]
+
+
+def read_recipients():
+    """
+    Reads the Merkle input for the recipients with a non-zero amount.
+
+    Returns the address strings, the wei amounts, and the addresses and amounts
+    encoded as (n, 32) uint8 ABI words.
+    """
+    df = pd.read_csv(
+        MERKLE_INPUT_FILE, header=None, names=["Address", "Amount"], dtype=str
+    )
+    print(f"Recipients in Merkle input: {len(df)}")
+
+    duplicates = df["Address"].str.lower().duplicated()
+    if duplicates.any():
+        raise ValueError(
+            f"Duplicate addresses in Merkle input: {df.loc[duplicates, 'Address'].tolist()[:5]}"
+        )
+
+    # Plain lists iterate far faster than Series for the per-row conversions below
+    address_strings = []
+    values = []
+    for address, amount in zip(df["Address"].tolist(), df["Amount"].tolist()):
+        value = int(amount)
+        if value > 0:
+            address_strings.append(address)
+            values.append(value)
+    print(
+        f"Recipients after dropping zero amounts: {len(values)} (dropped {len(df) - len(values)})"
+    )
+
+    addresses = np.zeros((len(values), 32), dtype=np.uint8)
+    addresses[:, 12:] = np.frombuffer(
+        bytes.fromhex("".join(address[2:] for address in address_strings)),
+        dtype=np.uint8,
+    ).reshape(-1, 20)
+
+    amounts = np.frombuffer(
+        b"".join(value.to_bytes(32, "big") for value in values), dtype=np.uint8
+    ).reshape(-1, 32)
+
+    return address_strings, values, addresses, amounts
+
+
+def recipient_gas(addresses, amounts):
+    """Gas each recipient adds to a batch: the transfer plus its two calldata words."""
+    zero_bytes = (addresses == 0).sum(axis=1) + (amounts == 0).sum(axis=1)
+    calldata_gas = (
+        zero_bytes * CALLDATA_ZERO_BYTE_GAS
+        + (RECIPIENT_BYTES - zero_bytes) * CALLDATA_NONZERO_BYTE_GAS
+    )
+    return TRANSFER_GAS + calldata_gas.astype(np.int64)
+
+
+def plan_batches(gas, max_batch_gas, max_calldata_bytes):
+    """
+    Packs recipients into batches with the next-fit bin-packing heuristic.
+
+    Every recipient costs roughly the same, so next-fit wastes less than one
+    transfer per batch while staying linear: each batch boundary is found with a
+    binary search over the running gas total instead of a per-row loop.
+
+    Returns a list of (start, end) row ranges.
+    """
+    header_gas = (
+        TX_BASE_GAS + BATCH_OVERHEAD_GAS + HEADER_BYTES * CALLDATA_NONZERO_BYTE_GAS
+    )
+    gas_budget = max_batch_gas - header_gas
+    max_recipients = (max_calldata_bytes - HEADER_BYTES) // RECIPIENT_BYTES
+    if gas_budget < gas.max(initial=0) or max_recipients < 1:
+        raise ValueError("Batch limits are too small to fit a single transfer")
+
+    cumulative_gas = np.concatenate([[0], np.cumsum(gas)])
+    batches = []
+    start = 0
+    while start < len(gas):
+        end = np.searchsorted(
+            cumulative_gas, cumulative_gas[start] + gas_budget, side="right"
+        ) - 1
+        end = min(end, start + max_recipients, len(gas))
+        batches.append((start, end))
+        start = end
+    return batches
+
+
+def encode_batch(token, addresses, amounts):
+    """ABI-encodes a disperseToken call for one batch."""
+    count = len(addresses)
+    recipients_offset = 3 * 32
+    values_offset = recipients_offset + 32 + count * 32
+    return b"".join(
+        [
+            DISPERSE_TOKEN_SELECTOR,
+            bytes.fromhex(token[2:]).rjust(32, b"\0"),
+            recipients_offset.to_bytes(32, "big"),
+            values_offset.to_bytes(32, "big"),
+            count.to_bytes(32, "big"),
+            addresses.tobytes(),
+            count.to_bytes(32, "big"),
+            amounts.tobytes(),
+        ]
+    )
+
+
+def calldata_gas(calldata):
+    """Calldata gas of an encoded transaction payload."""
+    zero_bytes = calldata.count(0)
+    return (
+        zero_bytes * CALLDATA_ZERO_BYTE_GAS
+        + (len(calldata) - zero_bytes) * CALLDATA_NONZERO_BYTE_GAS
+    )
+
+
+def main():
+    """
+    Plans a push distribution from the Merkle input for small recipient sets.
+
+    Packs transfers into disperseToken batches under the gas and calldata
+    limits, writes each batch's calldata to DISTRIBUTION_DIR and a plan with
+    per-batch cost estimates to PLAN_OUTPUT_FILE.
+    """
+    parser = argparse.ArgumentParser(description="Plan a gas-bounded push distribution.")
+    parser.add_argument("token", help="Address of the token being distributed")
+    parser.add_argument(
+        "--max-batch-gas",
+        type=int,
+        default=MAX_BATCH_GAS,
+        help=f"Gas limit per batch transaction (default: {MAX_BATCH_GAS})",
+    )
+    parser.add_argument(
+        "--max-calldata-bytes",
+        type=int,
+        default=MAX_CALLDATA_BYTES,
+        help=f"Calldata size limit per batch (default: {MAX_CALLDATA_BYTES})",
+    )
+    parser.add_argument(
+        "--gas-price-gwei",
+        type=float,
+        default=GAS_PRICE_GWEI,
+        help=f"Gas price used for cost estimates (default: {GAS_PRICE_GWEI})",
+    )
+    args = parser.parse_args()
+
+    if len(args.token) != 42 or not args.token.startswith("0x"):
+        raise ValueError(f"Invalid token address: {args.token}")
+
+    print("--- Planning Push Distribution ---")
+    address_strings, values, addresses, amounts = read_recipients()
+    if not values:
+        print("No recipients with a non-zero amount, nothing to distribute")
+    gas = recipient_gas(addresses, amounts)
+    batches = plan_batches(gas, args.max_batch_gas, args.max_calldata_bytes)
+
+    output_dir = Path(DISTRIBUTION_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for stale_file in output_dir.glob("batch_*.calldata"):
+        stale_file.unlink()
+
+    plan = []
+    for number, (start, end) in enumerate(batches, start=1):
+        calldata = encode_batch(args.token, addresses[start:end], amounts[start:end])
+        (output_dir / f"batch_{number:05d}.calldata").write_text(
+            f"0x{calldata.hex()}\n"
+        )
+
+        gas_estimate = (
+            TX_BASE_GAS
+            + BATCH_OVERHEAD_GAS
+            + (end - start) * TRANSFER_GAS
+            + calldata_gas(calldata)
+        )
+        plan.append(
+            {
+                "Batch": number,
+                "Recipients": end - start,
+                "Tokens": sum(values[start:end]) // 10**18,
+                "CalldataBytes": len(calldata),
+                "GasEstimate": gas_estimate,
+                "CostEth": gas_estimate * args.gas_price_gwei / 1e9,
+                "FirstAddress": address_strings[start],
+                "LastAddress": address_strings[end - 1],
+            }
+        )
+
+    plan_df = pd.DataFrame(plan, columns=PLAN_COLUMNS)
+    plan_df.to_csv(PLAN_OUTPUT_FILE, index=False)
+
+    print(f"Batches: {len(plan_df)}")
+    print(f"Total gas: {plan_df['GasEstimate'].sum():,}")
+    print(
+        f"Estimated cost at {args.gas_price_gwei} gwei: {plan_df['CostEth'].sum():,.4f} ETH"
+    )
+    print(f"Total tokens: {plan_df['Tokens'].sum():,}")
+    print(f"Calldata files saved to {DISTRIBUTION_DIR}")
+    print(f"Distribution plan saved to {PLAN_OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+from eth_utils import to_checksum_address
+
+from campaign_rules import (
+    Campaign,
+    FixedAllocation,
+    MatchAllocation,
+    Threshold,
+    TieredAllocation,
+    load_address_keys,
+    run_campaign,
+)
+from persistent_cache import PersistentCache
+
+A = "0xDBbD65026a07cFbFa1aa92744E4D69951686077d"
+B = "0x8BdaB88305784De6c51B36A3f350a25F1b7A153a"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with PersistentCache(cache_dir=str(tmp_path / "cache")) as cache:
+        yield cache
+
+
+def make_campaign(tmp_path, rows, **rules):
+    source_file = tmp_path / "source.csv"
+    pd.DataFrame(rows, columns=["eoa", "points"]).to_csv(source_file, index=False)
+    return Campaign(
+        name="Test",
+        source_file=str(source_file),
+        output_file=str(tmp_path / "allocations.csv"),
+        address_column="eoa",
+        **rules,
+    )
+
+
+def test_drop_log_skips_addresses_paid_by_another_row(tmp_path, cache):
+    campaign = make_campaign(
+        tmp_path,
+        [(A, 150), (A, 300), (B, 150)],
+        dedupe=None,
+        filters=[Threshold("points", ">=", 100, "points < 100")],
+        allocation=MatchAllocation("points", 300, 385, zero_reason="points != 300"),
+    )
+    allocations, drops = run_campaign(campaign, cache)
+
+    assert allocations["Token"].tolist() == [0, 385, 0]
+    assert drops[["Address", "Reason"]].values.tolist() == [[B, "points != 300"]]
+
+
+def address(i):
+    return to_checksum_address(f"0x{i:040x}")
+
+
+ARMA_TIERS = TieredAllocation(
+    column="points",
+    bounds=[60, 100, 250],
+    tokens=[180, 385, 1150],
+    zero_reason="no points tier",
+)
+
+
+@pytest.mark.parametrize(
+    "dedupe, expected",
+    [
+        # The first row of A is kept by the dedupe, then fails the threshold
+        ("before_filters", [(B, 180)]),
+        # The failing row of A is filtered first, so its second row survives the dedupe
+        ("after_filters", [(A, 180), (B, 180)]),
+    ],
+)
+def test_dedupe_before_and_after_filters(tmp_path, cache, dedupe, expected):
+    campaign = make_campaign(
+        tmp_path,
+        [(A, 50), (A.lower(), 200), (B, 200), (B, 300)],
+        dedupe=dedupe,
+        filters=[Threshold("points", ">=", 100, "points < 100")],
+        allocation=FixedAllocation(180),
+    )
+    allocations, _ = run_campaign(campaign, cache)
+    assert list(allocations.itertuples(index=False, name=None)) == expected
+
+
+def test_tier_edges(tmp_path, cache):
+    points = [59, 60, 61, 100, 101, 250, 251]
+    campaign = make_campaign(
+        tmp_path,
+        [(address(i), p) for i, p in enumerate(points)],
+        filters=[Threshold("points", ">=", 60, "points < 60")],
+        allocation=ARMA_TIERS,
+    )
+    allocations, drops = run_campaign(campaign, cache)
+
+    assert allocations["Token"].tolist() == [0, 180, 180, 385, 385, 1150]
+    assert drops[["Address", "Reason"]].values.tolist() == [
+        [address(0), "points < 60"],
+        [address(1), "no points tier"],
+    ]
+    assert pd.read_csv(campaign.output_file).equals(allocations)
+
+
+def test_arma_membership(tmp_path, cache):
+    arma_file = tmp_path / "arma.csv"
+    pd.DataFrame({"eoa": [f"  {A.upper().replace('0X', '0x')} ", address(9)]}).to_csv(
+        arma_file, index=False
+    )
+    campaign = make_campaign(
+        tmp_path,
+        [(A.lower(), 300), (B, 300), (None, 300)],
+        require_arma=True,
+        allocation=FixedAllocation(180),
+    )
+    allocations, drops = run_campaign(campaign, cache, load_address_keys(arma_file, "eoa"))
+
+    assert list(allocations.itertuples(index=False, name=None)) == [(A, 180)]
+    assert drops[["Address", "Reason"]].values.tolist() == [[B, "not in ARMA leaderboard"]]
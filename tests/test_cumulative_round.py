@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from cumulative_round import merge_rounds
+from persistent_cache import PersistentCache
+
+WALLET = "0xDBbD65026a07cFbFa1aa92744E4D69951686077d"
+OTHER = "0x8BdaB88305784De6c51B36A3f350a25F1b7A153a"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        yield cache
+
+
+def test_differently_cased_addresses_are_one_leaf(cache):
+    df_previous = pd.DataFrame({"Address": [f" {WALLET.lower()}"], "Cumulative": [180]})
+    df_round = pd.DataFrame({"Address": [WALLET, OTHER], "Total": [385, 180]})
+
+    merged = merge_rounds(df_previous, df_round, cache).set_index("Address")
+
+    assert len(merged) == 2
+    assert merged.loc[WALLET, ["Previous", "Round", "Cumulative", "Delta"]].tolist() == [
+        180,
+        385,
+        565,
+        385,
+    ]
+    assert merged.loc[OTHER, "Cumulative"] == 180
+
+
+def test_duplicate_after_checksumming_is_rejected(cache):
+    df_previous = pd.DataFrame(
+        {"Address": [WALLET, WALLET.lower()], "Cumulative": [180, 180]}
+    )
+    df_round = pd.DataFrame({"Address": [OTHER], "Total": [180]})
+    with pytest.raises(ValueError, match="Duplicate addresses in previous round"):
+        merge_rounds(df_previous, df_round, cache)
+
+
+@pytest.mark.parametrize("amount", [1.5, -180, float("nan")])
+def test_invalid_amounts_are_rejected(cache, amount):
+    df_previous = pd.DataFrame({"Address": [WALLET], "Cumulative": [amount]})
+    df_round = pd.DataFrame({"Address": [OTHER], "Total": [180]})
+    with pytest.raises(ValueError, match="whole non-negative tokens"):
+        merge_rounds(df_previous, df_round, cache)
@@ -0,0 +1,45 @@
+import numpy as np
+from eth_utils import to_checksum_address
+
+from eligibility_filter import (
+    build_filter,
+    filter_contains,
+    filter_contains_many,
+    measure_false_positive_rate,
+)
+
+
+def random_addresses(n, seed):
+    rng = np.random.default_rng(seed)
+    return [to_checksum_address("0x" + rng.bytes(20).hex()) for _ in range(n)]
+
+
+def test_members_always_match():
+    members = random_addresses(5_000, seed=1)
+    bloom = build_filter(members, 0.01)
+    assert filter_contains_many(bloom, members).all()
+    assert all(filter_contains(bloom, address) for address in members[:500])
+
+
+def test_false_positive_rate_near_target():
+    members = random_addresses(5_000, seed=2)
+    for fp_rate in (0.01, 0.001):
+        bloom = build_filter(members, fp_rate)
+        measured = measure_false_positive_rate(bloom, members, samples=50_000, seed=3)
+        assert measured <= fp_rate * 1.5
+
+
+def test_reference_lookup_matches_vectorized_lookup():
+    members = random_addresses(2_000, seed=4)
+    # A high target rate so both positive and negative answers are exercised
+    bloom = build_filter(members, 0.2)
+    candidates = members[:200] + random_addresses(2_000, seed=5)
+    vectorized = filter_contains_many(bloom, candidates)
+    reference = np.array([filter_contains(bloom, address) for address in candidates])
+    assert (vectorized == reference).all()
+    assert reference[200:].any() and not reference[200:].all()
+
+
+def test_empty_filter():
+    bloom = build_filter([], 0.01)
+    assert not filter_contains_many(bloom, random_addresses(100, seed=6)).any()
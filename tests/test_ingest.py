@@ -0,0 +1,120 @@
+import asyncio
+import os
+import random
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pandas as pd
+import pytest
+from aiohttp import web
+
+import ingest
+from ingest import SOURCES, EndpointStream
+from mock_campaign_server import fake_address, make_app
+
+ROWS = 2_345
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    """The real sources, writing to tmp_path, with small pages and no waiting."""
+    monkeypatch.setattr(ingest, "INGEST_STATE_DIR", str(tmp_path / ".ingest"))
+    monkeypatch.setattr(ingest, "PAGE_SIZE", 100)
+    monkeypatch.setattr(ingest, "REQUESTS_PER_SECOND", 1e6)
+    monkeypatch.setattr(ingest, "MAX_RETRIES", 20)
+
+    # Retry-After and backoff delays would make the failure-injecting server slow
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay, *args: sleep(0, *args))
+
+    return [
+        ingest.CampaignSource(
+            source.name,
+            source.url_env,
+            str(tmp_path / f"{source.name}.csv"),
+            source.fields,
+        )
+        for source in SOURCES
+    ]
+
+
+def run_against_mock_server(sources, monkeypatch, failure_rate, port=0):
+    """Serves the mock APIs on a local port (0 picks a free one) and ingests every source."""
+
+    async def run():
+        runner = web.AppRunner(make_app(ROWS, failure_rate))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", port)
+        await site.start()
+        bound_port = runner.addresses[0][1]
+        try:
+            for source in sources:
+                monkeypatch.setenv(
+                    source.url_env, f"http://127.0.0.1:{bound_port}/{source.name}"
+                )
+            await ingest.ingest(sources)
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def assert_complete_export(source):
+    df = pd.read_csv(source.output_file)
+    assert list(df.columns) == list(source.fields)
+    address_column = next(
+        column for column, field in source.fields.items() if field in ("address", "walletAddress")
+    )
+    assert df[address_column].tolist() == [
+        fake_address(source.name, i) for i in range(ROWS)
+    ]
+
+
+def test_fetches_every_row_exactly_once_despite_failures(sources, monkeypatch):
+    random.seed(0)
+    run_against_mock_server(sources, monkeypatch, failure_rate=0.2)
+    for source in sources:
+        assert_complete_export(source)
+    assert not list(Path(ingest.INGEST_STATE_DIR).iterdir())
+
+
+def test_interrupted_run_resumes_from_saved_cursor(sources, monkeypatch):
+    random.seed(1)
+    fetch_page = EndpointStream.fetch_page
+    pages = {"fetched": 0}
+
+    async def preempted_fetch_page(self, session, limiter):
+        if pages["fetched"] == 20:
+            raise ConnectionResetError("preempted")
+        pages["fetched"] += 1
+        return await fetch_page(self, session, limiter)
+
+    monkeypatch.setattr(EndpointStream, "fetch_page", preempted_fetch_page)
+    with pytest.raises(ConnectionResetError):
+        run_against_mock_server(sources, monkeypatch, failure_rate=0.1)
+    # The saved cursors belong to the endpoint URLs, so resume on the same port
+    port = urlsplit(os.environ[sources[0].url_env]).port
+    for source in sources:
+        assert not Path(source.output_file).exists()
+
+    # Simulate a page that was half written when the machine went down
+    part_files = sorted(Path(ingest.INGEST_STATE_DIR).glob("*.csv"))
+    assert part_files
+    with open(part_files[0], "a") as f:
+        f.write("0xhalf,written")
+
+    resumed = {"fetched": 0}
+
+    async def counting_fetch_page(self, session, limiter):
+        resumed["fetched"] += 1
+        return await fetch_page(self, session, limiter)
+
+    monkeypatch.setattr(EndpointStream, "fetch_page", counting_fetch_page)
+    run_against_mock_server(sources, monkeypatch, failure_rate=0.1, port=port)
+    for source in sources:
+        assert_complete_export(source)
+
+    # Pages saved before the interruption are not fetched again; at most one
+    # in-flight page per endpoint was lost
+    total_pages = len(sources) * -(-ROWS // ingest.PAGE_SIZE)
+    assert resumed["fetched"] <= total_pages - pages["fetched"] + len(sources)
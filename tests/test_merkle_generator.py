@@ -0,0 +1,242 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from eth_utils import to_checksum_address
+from multiproof import StandardMerkleTree
+from multiproof.standard import MultiProof
+
+from merkle_tree import LEAF_ENCODING, build_tree, hash_leaves
+from persistent_cache import PersistentCache
+
+# The script's name starts with a digit, so it cannot be imported by name
+spec = importlib.util.spec_from_file_location(
+    "airdrop_merkle_generator",
+    Path(__file__).resolve().parent.parent / "3_airdrop_merkle_generator.py",
+)
+generator_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generator_module)
+AirdropConfig = generator_module.AirdropConfig
+AirdropMerkleGenerator = generator_module.AirdropMerkleGenerator
+CheckpointStore = generator_module.CheckpointStore
+
+ROWS = 50
+CHUNK_SIZE = 7
+CHUNKS = -(-ROWS // CHUNK_SIZE)
+
+
+class Preempted(Exception):
+    pass
+
+
+def write_allocations(path, seed):
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        for _ in range(ROWS):
+            address = to_checksum_address("0x" + rng.bytes(20).hex())
+            f.write(f"{address},{int(rng.integers(1, 10_000))}000000000000000000\n")
+
+
+def make_generator(directory, input_file):
+    directory.mkdir(exist_ok=True)
+    return AirdropMerkleGenerator(
+        AirdropConfig(
+            input_file=input_file,
+            output_file=directory / "tree.json",
+            proof_file=directory / "proof.json",
+            multiproof_file=directory / "multiproof.json",
+            checkpoint_dir=directory / "checkpoints",
+            proof_chunk_size=CHUNK_SIZE,
+        )
+    )
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # verify() writes its report under ./processed
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def cache(workdir):
+    with PersistentCache(cache_dir=str(workdir / ".cache")) as cache:
+        yield cache
+
+
+@pytest.fixture
+def input_file(workdir):
+    path = workdir / "allocations.csv"
+    write_allocations(path, seed=0)
+    return path
+
+
+def reference_proof_file(workdir, input_file, cache, name="reference"):
+    """proof.json of an uninterrupted build."""
+    generator = make_generator(workdir / name, input_file)
+    generator.process(cache)
+    return generator.config.proof_file.read_bytes()
+
+
+def preempt_after_proof_chunks(monkeypatch, saved_chunks):
+    """Makes CheckpointStore.save fail once `saved_chunks` proof chunks were saved."""
+    save = CheckpointStore.save
+    saved = {"chunks": 0}
+
+    def preempted_save(store, name, data):
+        if name.startswith("proofs/"):
+            if saved["chunks"] == saved_chunks:
+                raise Preempted(name)
+            saved["chunks"] += 1
+        save(store, name, data)
+
+    monkeypatch.setattr(CheckpointStore, "save", preempted_save)
+
+
+def count_calls(monkeypatch, owner, name):
+    """Wraps owner.name and returns the list its calls' arguments are appended to."""
+    function = getattr(owner, name)
+    calls = []
+
+    def counted(*args, **kwargs):
+        calls.append((args, kwargs))
+        return function(*args, **kwargs)
+
+    monkeypatch.setattr(owner, name, counted)
+    return calls
+
+
+def test_resumed_build_writes_identical_proof_file(workdir, input_file, cache, monkeypatch):
+    reference = reference_proof_file(workdir, input_file, cache)
+    generator = make_generator(workdir / "run", input_file)
+
+    with monkeypatch.context() as patch:
+        preempt_after_proof_chunks(patch, saved_chunks=3)
+        with pytest.raises(Preempted):
+            generator.process(cache)
+    assert not generator.config.proof_file.exists()
+
+    read_calls = count_calls(monkeypatch, AirdropMerkleGenerator, "read_airdrop_data")
+    proof_calls = count_calls(monkeypatch, generator_module, "leaf_proof")
+    generator.process(cache)
+
+    assert generator.config.proof_file.read_bytes() == reference
+    assert not read_calls
+    assert len(proof_calls) == ROWS - 3 * CHUNK_SIZE
+    assert not generator.config.checkpoint_dir.exists()
+
+
+def test_corrupted_checkpoint_recomputes_it_and_later_phases(
+    workdir, input_file, cache, monkeypatch
+):
+    reference = reference_proof_file(workdir, input_file, cache)
+    generator = make_generator(workdir / "run", input_file)
+
+    with monkeypatch.context() as patch:
+        preempt_after_proof_chunks(patch, saved_chunks=2)
+        with pytest.raises(Preempted):
+            generator.process(cache)
+
+    leaf_hashes_file = generator.config.checkpoint_dir / "leaf_hashes"
+    data = bytearray(leaf_hashes_file.read_bytes())
+    data[0] ^= 0xFF
+    leaf_hashes_file.write_bytes(bytes(data))
+
+    store = CheckpointStore(generator.config.checkpoint_dir, input_file)
+    assert store.load("leaves") is not None
+    assert store.load("leaf_hashes") is None
+
+    read_calls = count_calls(monkeypatch, AirdropMerkleGenerator, "read_airdrop_data")
+    hash_calls = count_calls(monkeypatch, AirdropMerkleGenerator, "hash_leaves")
+    tree_calls = count_calls(monkeypatch, AirdropMerkleGenerator, "generate_tree")
+    proof_calls = count_calls(monkeypatch, generator_module, "leaf_proof")
+    generator.process(cache)
+
+    assert generator.config.proof_file.read_bytes() == reference
+    assert not read_calls
+    assert len(hash_calls) == 1
+    # The tree is rebuilt from the leaf hashes, not from its saved nodes
+    (args, kwargs), = tree_calls
+    assert args[3:] == () and "nodes" not in kwargs
+    assert len(proof_calls) == ROWS
+
+
+def test_changed_input_discards_checkpoints(workdir, input_file, cache, monkeypatch):
+    generator = make_generator(workdir / "run", input_file)
+    with monkeypatch.context() as patch:
+        preempt_after_proof_chunks(patch, saved_chunks=CHUNKS - 1)
+        with pytest.raises(Preempted):
+            generator.process(cache)
+
+    write_allocations(input_file, seed=1)
+    store = CheckpointStore(generator.config.checkpoint_dir, input_file)
+    assert store.manifest["files"] == {}
+    assert all(store.load(phase) is None for phase in CheckpointStore.PHASES)
+
+    read_calls = count_calls(monkeypatch, AirdropMerkleGenerator, "read_airdrop_data")
+    proof_calls = count_calls(monkeypatch, generator_module, "leaf_proof")
+    generator.process(cache)
+
+    assert len(read_calls) == 1
+    assert len(proof_calls) == ROWS
+    reference = reference_proof_file(workdir, input_file, cache)
+    assert generator.config.proof_file.read_bytes() == reference
+
+
+def random_tree(n, seed):
+    rng = np.random.default_rng(seed)
+    values = [
+        (to_checksum_address("0x" + rng.bytes(20).hex()), int(rng.integers(1, 10_000)) * 10**18)
+        for _ in range(n)
+    ]
+    return build_tree(values, hash_leaves(values))
+
+
+def proof_nodes(generator, tree, batches):
+    return sum(len(generator.generate_multi_proof(tree, batch)["proof"]) for batch in batches)
+
+
+def test_every_multiproof_batch_verifies_against_the_root(workdir):
+    tree = random_tree(300, seed=2)
+    rng = np.random.default_rng(3)
+    claimed = [tree.values[i].value[0] for i in rng.permutation(300)[:120]]
+    generator = make_generator(workdir / "run", Path("unused.csv"))
+
+    batches = generator.generate_multi_proofs(tree, claimed, batch_size=25)
+
+    with open(generator.config.multiproof_file) as f:
+        saved = json.load(f)
+    assert saved["root"] == tree.root and saved["batches"] == batches
+    for batch in batches:
+        assert 0 < len(batch["leaves"]) <= 25
+        multi_proof = MultiProof(
+            leaves=batch["leaves"], proof=batch["proof"], proof_flags=batch["proofFlags"]
+        )
+        assert StandardMerkleTree.verify_multi_proof(tree.root, LEAF_ENCODING, multi_proof)
+    claimed_leaves = [leaf[0] for batch in batches for leaf in batch["leaves"]]
+    assert sorted(claimed_leaves) == sorted(claimed)
+
+    # Batching by tree position needs fewer proof nodes than batching in claim order
+    planned = generator.plan_batches(tree, claimed, batch_size=25)
+    value_index = {leaf.value[0]: i for i, leaf in enumerate(tree.values)}
+    in_claim_order = [
+        [value_index[address] for address in claimed[start : start + 25]]
+        for start in range(0, len(claimed), 25)
+    ]
+    assert proof_nodes(generator, tree, planned) < proof_nodes(
+        generator, tree, in_claim_order
+    )
+
+
+def test_duplicate_or_unknown_claims_are_rejected(workdir):
+    tree = random_tree(20, seed=4)
+    generator = make_generator(workdir / "run", Path("unused.csv"))
+    first, second = tree.values[0].value[0], tree.values[1].value[0]
+
+    with pytest.raises(ValueError, match="Duplicate address in claims"):
+        generator.plan_batches(tree, [first, second, first], batch_size=10)
+    unknown = to_checksum_address("0x" + "11" * 20)
+    with pytest.raises(ValueError, match="Address not found in Merkle tree"):
+        generator.plan_batches(tree, [first, unknown], batch_size=10)
@@ -0,0 +1,41 @@
+from eth_utils import to_checksum_address
+
+from merkle_tree import hash_leaves
+from persistent_cache import PersistentCache
+
+WALLET = "0xDBbD65026a07cFbFa1aa92744E4D69951686077d"
+
+
+def test_checksums_are_cached(tmp_path):
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        assert cache.checksum_addresses([WALLET.lower()]) == [WALLET]
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        assert cache.checksum_addresses([WALLET.upper().replace("0X", "0x")]) == [WALLET]
+
+
+def test_corrupted_checksum_casing_is_recomputed(tmp_path):
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        cache.checksum_addresses([WALLET])
+        cache.connection.execute("UPDATE checksums SET checksum = lower(checksum)")
+        cache.connection.commit()
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        assert cache.checksum_addresses([WALLET.lower()]) == [to_checksum_address(WALLET)]
+
+
+def test_corrupted_leaf_hash_is_recomputed(tmp_path):
+    values = [(WALLET, 180 * 10**18)]
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        cache.leaf_hashes(values)
+        cache.connection.execute("UPDATE leaf_hashes SET hash = zeroblob(32)")
+        cache.connection.commit()
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        assert cache.leaf_hashes(values) == hash_leaves(values)
+
+
+def test_corrupted_database_is_discarded(tmp_path):
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        cache.checksum_addresses([WALLET])
+        path = cache.path
+    path.write_bytes(b"not a database" * 100)
+    with PersistentCache(cache_dir=str(tmp_path)) as cache:
+        assert cache.checksum_addresses([WALLET.lower()]) == [WALLET]
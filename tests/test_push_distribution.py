@@ -0,0 +1,68 @@
+import numpy as np
+
+from push_distribution import (
+    BATCH_OVERHEAD_GAS,
+    CALLDATA_NONZERO_BYTE_GAS,
+    HEADER_BYTES,
+    MAX_BATCH_GAS,
+    MAX_CALLDATA_BYTES,
+    RECIPIENT_BYTES,
+    TRANSFER_GAS,
+    TX_BASE_GAS,
+    calldata_gas,
+    encode_batch,
+    plan_batches,
+    recipient_gas,
+)
+
+TOKEN = "0x" + "ab" * 20
+
+
+def test_encoded_batch_size_matches_layout():
+    for count in (0, 1, 7):
+        addresses = np.full((count, 32), 1, dtype=np.uint8)
+        amounts = np.full((count, 32), 2, dtype=np.uint8)
+        calldata = encode_batch(TOKEN, addresses, amounts)
+        assert len(calldata) == HEADER_BYTES + count * RECIPIENT_BYTES
+
+
+def batch_gas(calldata, recipients):
+    """The same estimate main() writes to the plan."""
+    return (
+        TX_BASE_GAS
+        + BATCH_OVERHEAD_GAS
+        + recipients * TRANSFER_GAS
+        + calldata_gas(calldata)
+    )
+
+
+def test_batches_respect_gas_and_calldata_limits():
+    rng = np.random.default_rng(0)
+    addresses = np.zeros((2_000, 32), dtype=np.uint8)
+    addresses[:, 12:] = rng.integers(0, 256, size=(2_000, 20), dtype=np.uint8)
+    amounts = np.zeros((2_000, 32), dtype=np.uint8)
+    amounts[:, 20:] = rng.integers(0, 256, size=(2_000, 12), dtype=np.uint8)
+    gas = recipient_gas(addresses, amounts)
+
+    # Low enough that the gas limit, not the calldata limit, cuts the batches
+    max_batch_gas = 1_000_000
+    assert max_batch_gas // TRANSFER_GAS * RECIPIENT_BYTES < MAX_CALLDATA_BYTES
+    batches = plan_batches(gas, max_batch_gas, MAX_CALLDATA_BYTES)
+
+    assert batches[0][0] == 0 and batches[-1][1] == len(gas)
+    assert all(end == start for (_, end), (start, _) in zip(batches, batches[1:]))
+    for start, end in batches:
+        calldata = encode_batch(TOKEN, addresses[start:end], amounts[start:end])
+        assert len(calldata) <= MAX_CALLDATA_BYTES
+        assert batch_gas(calldata, end - start) <= max_batch_gas
+
+    # Next-fit: in the planner's gas model (header bytes counted as non-zero),
+    # adding the following recipient would have exceeded the gas limit
+    header_gas = TX_BASE_GAS + BATCH_OVERHEAD_GAS + HEADER_BYTES * CALLDATA_NONZERO_BYTE_GAS
+    for start, end in batches[:-1]:
+        assert header_gas + gas[start : end + 1].sum() > max_batch_gas
+
+
+def test_no_recipients_plans_no_batches():
+    gas = recipient_gas(np.zeros((0, 32), np.uint8), np.zeros((0, 32), np.uint8))
+    assert plan_batches(gas, MAX_BATCH_GAS, MAX_CALLDATA_BYTES) == []
@@ -0,0 +1,42 @@
+from multiproof import StandardMerkleTree
+
+from merkle_tree import LEAF_ENCODING, build_tree, hash_leaves, leaf_proof
+from verification import check_proofs
+
+VALUES = [
+    ("0xDBbD65026a07cFbFa1aa92744E4D69951686077d", 180 * 10**18),
+    ("0x8BdaB88305784De6c51B36A3f350a25F1b7A153a", 385 * 10**18),
+    ("0xADA909Ee75Fd64F756F5B7334F605Fb8909fE63A", 1150 * 10**18),
+]
+
+
+def proof_entries(tree):
+    return [
+        {"address": leaf.value[0], "amount": leaf.value[1], "proof": leaf_proof(tree, i)}
+        for i, leaf in enumerate(tree.values)
+    ]
+
+
+def test_valid_proofs_pass():
+    tree = StandardMerkleTree.of(VALUES, LEAF_ENCODING)
+    (check,) = check_proofs(tree.root, proof_entries(tree))
+    assert check["passed"]
+
+
+def test_tree_built_from_a_wrong_leaf_hash_fails():
+    leaf_hashes = hash_leaves(VALUES)
+    leaf_hashes[1] = b"\x11" * 32
+    tree = build_tree(VALUES, leaf_hashes)
+    # The proofs are consistent with the tree's own root, but not with the values
+    (check,) = check_proofs(tree.root, proof_entries(tree))
+    assert not check["passed"]
+    assert check["detail"]["first"] == [VALUES[1][0]]
+
+
+def test_changed_amount_fails():
+    tree = StandardMerkleTree.of(VALUES, LEAF_ENCODING)
+    entries = proof_entries(tree)
+    entries[0]["amount"] += 1
+    (check,) = check_proofs(tree.root, entries)
+    assert not check["passed"]
+    assert check["detail"]["first"] == [entries[0]["address"]]
@@ -0,0 +1,261 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from allocation_diff import sorted_join
+from constants import AIRDROP_BUDGET, CAMPAIGN_COLUMNS, TOTAL_SUPPLY
+from merkle_tree import hash_leaves, process_proof
+
+# Category breakdown of the campaign columns, as reported by merge_data.py
+CATEGORIES = {
+    "ARMA": ["ARMA"],
+    "Socials": ["Layer3", "Galxe", "Megaphone"],
+    "Community": ["Community", "Discord"],
+}
+
+REPORT_FILE = "./processed/verification_report.json"
+
+WEI_ZEROS = "0" * 18
+
+
+def allocation_wei(totals):
+    """Converts whole token amounts to wei strings without going through floats."""
+    return pd.Series(totals).astype(np.int64).astype(str) + WEI_ZEROS
+
+
+def canonical_wei(amounts):
+    """Normalizes wei amounts (ints or decimal strings) to decimal strings without leading zeros."""
+    return pd.Series(amounts).astype(str).str.lstrip("0").replace("", "0").to_numpy(dtype=object)
+
+
+def invariant(name, passed, detail):
+    return {"name": name, "passed": bool(passed), "detail": detail}
+
+
+def first(values, n=5):
+    return [str(value) for value in values[:n]]
+
+
+def check_allocations(df, budget=AIRDROP_BUDGET):
+    """
+    Checks a total_allocations table in one pass over its campaign columns.
+
+    The campaign columns and Total are read into a single matrix; the per-campaign
+    sums, the per-row totals and the category sums all come from that matrix.
+
+    Args:
+        df: DataFrame with Address, the CAMPAIGN_COLUMNS columns and Total
+        budget: Maximum number of tokens the distribution may allocate
+
+    Returns:
+        (sums, invariants): per-campaign, per-category and total token sums,
+        and the list of checked invariants
+    """
+    addresses = df["Address"].to_numpy(dtype=object)
+    matrix = df[CAMPAIGN_COLUMNS + ["Total"]].to_numpy()
+
+    # Negative, fractional or missing amounts are reported and counted as 0 below
+    whole = (matrix >= 0) & (np.floor(matrix) == matrix)
+    bad_rows = ~whole.all(axis=1)
+    matrix = np.where(whole, matrix, 0).astype(np.int64)
+    campaigns, totals = matrix[:, :-1], matrix[:, -1]
+
+    column_sums = matrix.sum(axis=0)
+    campaign_sums = dict(zip(CAMPAIGN_COLUMNS + ["Total"], column_sums.tolist()))
+    category_sums = {
+        category: sum(campaign_sums[column] for column in columns)
+        for category, columns in CATEGORIES.items()
+    }
+    row_mismatches = campaigns.sum(axis=1) != totals
+    duplicates = df["Address"].str.lower().duplicated(keep=False).to_numpy()
+
+    invariants = [
+        invariant(
+            "whole_tokens",
+            not bad_rows.any(),
+            {"rows": int(bad_rows.sum()), "first": first(addresses[bad_rows])},
+        ),
+        invariant(
+            "unique_addresses",
+            not duplicates.any(),
+            {"rows": int(duplicates.sum()), "first": first(addresses[duplicates])},
+        ),
+        invariant(
+            "row_totals",
+            not row_mismatches.any(),
+            {"rows": int(row_mismatches.sum()), "first": first(addresses[row_mismatches])},
+        ),
+        invariant(
+            "category_sums",
+            sum(category_sums.values()) == campaign_sums["Total"],
+            {"categories": sum(category_sums.values()), "total": campaign_sums["Total"]},
+        ),
+        invariant(
+            "budget",
+            campaign_sums["Total"] <= budget,
+            {"allocated": campaign_sums["Total"], "budget": budget},
+        ),
+    ]
+    sums = {"campaigns": campaign_sums, "categories": category_sums}
+    return sums, invariants
+
+
+def check_amounts(expected_addresses, expected_wei, actual_addresses, actual_wei):
+    """
+    Checks that two address -> wei listings hold the same addresses and exactly the same amounts.
+
+    Both listings are aligned on the sorted union of their addresses, so the
+    comparison is a single elementwise pass with no per-address lookups.
+    """
+    expected_addresses = np.asarray(expected_addresses, dtype=object)
+    actual_addresses = np.asarray(actual_addresses, dtype=object)
+    addresses, expected_slots, actual_slots = sorted_join(
+        expected_addresses, actual_addresses
+    )
+
+    expected = np.full(len(addresses), None, dtype=object)
+    expected[expected_slots] = canonical_wei(expected_wei)
+    actual = np.full(len(addresses), None, dtype=object)
+    actual[actual_slots] = canonical_wei(actual_wei)
+
+    missing = actual == None  # noqa: E711, elementwise comparison
+    unexpected = expected == None  # noqa: E711
+    present = ~missing & ~unexpected
+    mismatches = present & (expected != actual)
+    mismatch_rows = np.flatnonzero(mismatches)[:5]
+
+    return [
+        invariant(
+            "address_sets",
+            not missing.any()
+            and not unexpected.any()
+            and len(addresses) == len(expected_addresses) == len(actual_addresses),
+            {
+                "expected": len(expected_addresses),
+                "actual": len(actual_addresses),
+                "missing": int(missing.sum()),
+                "unexpected": int(unexpected.sum()),
+                "first_missing": first(addresses[missing]),
+                "first_unexpected": first(addresses[unexpected]),
+            },
+        ),
+        invariant(
+            "wei_amounts",
+            not mismatches.any(),
+            {
+                "rows": int(mismatches.sum()),
+                "first": [
+                    {
+                        "address": addresses[i],
+                        "expected": expected[i],
+                        "actual": actual[i],
+                    }
+                    for i in mismatch_rows
+                ],
+            },
+        ),
+    ]
+
+
+def check_proofs(root, entries):
+    """Checks that every proof entry's (address, amount, proof) proves against the root."""
+    leaf_hashes = hash_leaves(
+        [(entry["address"], int(entry["amount"])) for entry in entries]
+    )
+    root_bytes = bytes.fromhex(root[2:])
+    failed = np.array(
+        [
+            process_proof(leaf_hash, entry["proof"]) != root_bytes
+            for leaf_hash, entry in zip(leaf_hashes, entries)
+        ],
+        dtype=bool,
+    )
+    addresses = np.asarray([entry["address"] for entry in entries], dtype=object)
+    return [
+        invariant(
+            "proofs",
+            not failed.any(),
+            {"root": root, "rows": int(failed.sum()), "first": first(addresses[failed])},
+        )
+    ]
+
+
+def print_summary(sums):
+    """Prints the per-campaign and per-category token sums."""
+    campaign_sums = sums["campaigns"]
+    category_sums = sums["categories"]
+    print("\nAllocation Summary:")
+    print("-" * 50)
+    for campaign, total in campaign_sums.items():
+        print(f"{campaign}: {total:,.0f} tokens ({total / TOTAL_SUPPLY:.3%})")
+    print("-" * 50)
+    print(
+        f"Socials (Layer3 + Galxe + Megaphone): {category_sums['Socials']:,.0f} tokens ({category_sums['Socials'] / TOTAL_SUPPLY:.3%})"
+    )
+    print(
+        f"Community (Community + Discord): {category_sums['Community']:,.0f} tokens ({category_sums['Community'] / TOTAL_SUPPLY:.3%})"
+    )
+    print("-" * 50)
+    print(
+        f"Total Allocation: {campaign_sums['Total']:,.0f} tokens ({campaign_sums['Total'] / TOTAL_SUPPLY:.3%})"
+    )
+
+
+def verify(
+    stage,
+    allocations=None,
+    amounts=None,
+    proofs=None,
+    budget=AIRDROP_BUDGET,
+    report_file=REPORT_FILE,
+):
+    """
+    Runs the checks of a pipeline stage, prints them and saves them to the report file.
+
+    The report file keeps the latest report of every stage under the stage's name.
+
+    Args:
+        stage: Report key, e.g. "merge", "merkle" or "post_verification"
+        allocations: Optional total_allocations DataFrame to check
+        amounts: Optional ((expected_addresses, expected_wei), (actual_addresses, actual_wei))
+            listings to compare
+        proofs: Optional (root, proof entries) whose proofs must prove against the root
+        budget: Maximum number of tokens the distribution may allocate
+        report_file: JSON file the report is saved to
+
+    Returns:
+        The report dict; report["passed"] is False if any invariant failed
+    """
+    print(f"--- Verifying {stage} ---")
+    report = {"stage": stage}
+    invariants = []
+    if allocations is not None:
+        sums, allocation_invariants = check_allocations(allocations, budget)
+        print_summary(sums)
+        report["addresses"] = len(allocations)
+        report.update(sums)
+        invariants += allocation_invariants
+    if amounts is not None:
+        (expected_addresses, expected_wei), (actual_addresses, actual_wei) = amounts
+        invariants += check_amounts(
+            expected_addresses, expected_wei, actual_addresses, actual_wei
+        )
+    if proofs is not None:
+        invariants += check_proofs(*proofs)
+    report["invariants"] = invariants
+    report["passed"] = all(check["passed"] for check in invariants)
+
+    print()
+    for check in invariants:
+        status = "✅" if check["passed"] else "❌"
+        print(f"{status} {check['name']}: {json.dumps(check['detail'])}")
+
+    path = Path(report_file)
+    reports = json.loads(path.read_text()) if path.exists() else {}
+    reports[stage] = report
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(reports, indent=2))
+    print(f"Verification report saved to {report_file}")
+    return report